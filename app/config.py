@@ -1,11 +1,22 @@
 from pydantic import BaseSettings
+from typing import Optional
 
 class Settings(BaseSettings):
-    database_hostname: str 
-    database_port: str
-    database_password: str
-    database_name: str
-    database_username: str
+    database_backend: str = "mysql"
+    database_hostname: Optional[str] = None
+    database_port: Optional[str] = None
+    database_password: Optional[str] = None
+    database_name: Optional[str] = None
+    database_username: Optional[str] = None
+    database_pool_size: int = 100
+    database_max_overflow: int = 50
+    database_read_hostnames: str = ""
+    database_read_pool_size: int = 20
+    database_read_max_overflow: int = 10
+    sqlite_path: str = "tekkis.sqlite3"
+    startup_scrape_url: str = "https://www.mudah.my/malaysia/cars-for-sale"
+    startup_scrape_limit: int = 50
+    response_cache_size: int = 1024
     
     class Config:
         env_file = ".env"
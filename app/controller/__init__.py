@@ -2,6 +2,7 @@ from .car.get_car import get_car_details, get_car_details_by_id
 from .api.create_api_key import create_api_key
 from .api.get_api_key import get_api_key, get_api_key_by_id
 from .api.delete_api_key import delete_api_key
+from .health.get_health import get_health, get_readiness
 
 __all__ = [
     "get_car_details",
@@ -9,5 +10,7 @@ __all__ = [
     "create_api_key",
     "get_api_key",
     "get_api_key_by_id",
-    "delete_api_key"
+    "delete_api_key",
+    "get_health",
+    "get_readiness"
 ]
\ No newline at end of file
@@ -1,20 +1,20 @@
-import datetime, pytz
-from sqlalchemy.orm import Session
+import datetime, pytz, asyncio
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.exc import SQLAlchemyError
 from fastapi import status, HTTPException, Depends
-from ...database.db_setup import get_db
+from ...database.db_setup import get_async_db
 from ...database import db_models
 from ... import schemas
 from ...utils import utils
 import logging
 
 
-async def create_api_key(db: Session = Depends(get_db)):
+async def create_api_key(db: AsyncSession = Depends(get_async_db)):
     """
     Create a new API key for the company.
 
     Args:
-        db (Session): The database session.
+        db (AsyncSession): The database session.
 
     Raises:
         HTTPException: If any unexpected error occurs.
@@ -27,13 +27,14 @@ async def create_api_key(db: Session = Depends(get_db)):
         """Add the new API key object to the database"""
         new_hashed_api_key = db_models.ApiKey(
             apiKey_id=api_key_id,
-            apiKey=utils.hash(api_key)
+            # Argon2 is CPU bound, hash in a worker thread so other requests keep being served
+            apiKey=await asyncio.to_thread(utils.hash, api_key)
         )
 
         db.add(new_hashed_api_key)
 
         """Commit the changes to the database"""
-        db.commit()
+        await db.commit()
 
         return schemas.ApiKeyOut(
             id=api_key_id,
@@ -45,7 +46,7 @@ async def create_api_key(db: Session = Depends(get_db)):
     
     except SQLAlchemyError as sqla_error:
         logging.error("SQLAlchemy error occurred: {}".format(str(sqla_error)))
-        db.rollback()  # Rollback the transaction in case of an SQLAlchemy error
+        await db.rollback()  # Rollback the transaction in case of an SQLAlchemy error
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Internal server error"
@@ -1,20 +1,21 @@
-from sqlalchemy.orm import Session
+from sqlalchemy import select, delete
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.exc import SQLAlchemyError
 from fastapi import status, HTTPException, Depends
-from ...database.db_setup import get_db
+from ...database.db_setup import get_async_db
 from ...database import db_models
 import logging
 
 async def delete_api_key(
         id: str, 
-        db: Session = Depends(get_db)
+        db: AsyncSession = Depends(get_async_db)
     ):
     """
     Deletes a specific API key by ID.
 
     Args:
         id (str): The ID of the API key to delete.
-        db (Session): The database session dependency.
+        db (AsyncSession): The database session dependency.
 
     Returns:
         Response: A response indicating the successful deletion of the API key.
@@ -26,13 +27,11 @@ async def delete_api_key(
     """
     try:
         """Query the API key by ID"""
-        api_key_query = db.query(
-            db_models.ApiKey
-        ).filter(
-            db_models.ApiKey.apiKey_id == id,
-        )
-        
-        api_key = api_key_query.first()
+        api_key = (await db.execute(
+            select(db_models.ApiKey).where(
+                db_models.ApiKey.apiKey_id == id,
+            )
+        )).scalars().first()
 
         """If the API key does not exist, raise a 404 Not Found error"""
         if api_key is None:
@@ -42,15 +41,19 @@ async def delete_api_key(
             )
 
         """Delete the API key and commit the transaction"""
-        api_key_query.delete(synchronize_session=False)
-        db.commit()
+        await db.execute(
+            delete(db_models.ApiKey).where(
+                db_models.ApiKey.apiKey_id == id,
+            )
+        )
+        await db.commit()
     
     except HTTPException as http_exception:
         raise http_exception
     
     except SQLAlchemyError as sqla_error:
         logging.error("SQLAlchemy error occurred: {}".format(str(sqla_error)))
-        db.rollback()  # Rollback the transaction in case of an SQLAlchemy error
+        await db.rollback()  # Rollback the transaction in case of an SQLAlchemy error
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Internal server error"
@@ -1,16 +1,17 @@
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.exc import SQLAlchemyError
 from fastapi import status, HTTPException, Depends
-from ...database.db_setup import get_db
+from ...database.db_setup import get_async_db
 from ...database import db_models
 import logging
 
-async def get_api_key( db: Session = Depends(get_db)):
+async def get_api_key( db: AsyncSession = Depends(get_async_db)):
     """
     Get all API keys for the given company.
 
     Args:
-        db (Session): The database session.
+        db (AsyncSession): The database session.
 
     Raises:
         HTTPException: If no API keys are found for the company 
@@ -18,9 +19,9 @@ async def get_api_key( db: Session = Depends(get_db)):
     """
     try:    
         """Get all API keys for the given company from the database"""
-        api_keys = db.query(
-            db_models.ApiKey
-        ).all()
+        api_keys = (await db.execute(
+            select(db_models.ApiKey)
+        )).scalars().all()
 
         """If no API keys are found, raise a 404 Not Found error"""
         if not api_keys:
@@ -37,7 +38,7 @@ async def get_api_key( db: Session = Depends(get_db)):
     
     except SQLAlchemyError as sqla_error:
         logging.error("SQLAlchemy error occurred: {}".format(str(sqla_error)))
-        db.rollback()  # Rollback the transaction in case of an SQLAlchemy error
+        await db.rollback()  # Rollback the transaction in case of an SQLAlchemy error
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Internal server error"
@@ -55,25 +56,25 @@ async def get_api_key( db: Session = Depends(get_db)):
     
 async def get_api_key_by_id(
         id: str, 
-        db: Session = Depends(get_db)
+        db: AsyncSession = Depends(get_async_db)
     ):
     """
     Get a specific API key for the given company.
 
     Args:
         id (str): The ID of the API key to retrieve.
-        db (Session): The database session.
+        db (AsyncSession): The database session.
 
     Raises:
         HTTPException: If the specified API key is not found, a 404 Not Found Error is raised.  
         HTTPException: If any other unexpected error occurs, a 500 Internal Server Error is raised.
     """
     try:
-        api_key = db.query(
-            db_models.ApiKey
-        ).filter(
-            db_models.ApiKey.apiKey_id == id,
-        ).first()
+        api_key = (await db.execute(
+            select(db_models.ApiKey).where(
+                db_models.ApiKey.apiKey_id == id,
+            )
+        )).scalars().first()
         
         """If the API key is not found, raise a 404 Not Found error"""
         if not api_key:
@@ -89,7 +90,7 @@ async def get_api_key_by_id(
     
     except SQLAlchemyError as sqla_error:
         logging.error("SQLAlchemy error occurred: {}".format(str(sqla_error)))
-        db.rollback()  # Rollback the transaction in case of an SQLAlchemy error
+        await db.rollback()  # Rollback the transaction in case of an SQLAlchemy error
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Internal server error"
@@ -0,0 +1,212 @@
+from fastapi import status, HTTPException, Query
+from sqlalchemy import select, and_, or_
+from sqlalchemy.orm import load_only
+from typing import Optional
+from ...database import db_models
+from ... import schemas
+
+"""
+Filters and sort keys of the car listing. The cars are read from the 'car_document' read model, which
+is only joined to 'general' and the spec tables the filters and sort key need. Every filter is an
+equality or range predicate on a column covered by the composite indexes declared on the models.
+"""
+
+# Column ordered by each sort key, ties are broken by the car's integer id
+SORT_KEYS = {
+    'id': db_models.CarDocument.general_id,
+    'price': db_models.General.price_value,
+    'year': db_models.General.mfg_year_value,
+    'mileage': db_models.General.mileage_low,
+}
+
+SORT_PATTERN = f"^-?({'|'.join(SORT_KEYS)})$"
+
+# Schema of each section of a car, in response order
+SECTION_SCHEMAS = {
+    'general': schemas.General,
+    'transmission': schemas.Transmission,
+    'engine': schemas.Engine,
+    'dimension_and_weight': schemas.DimensionAndWeight,
+    'brakes': schemas.Brakes,
+    'suspension': schemas.Suspension,
+    'steering': schemas.Steering,
+    'tyres_and_wheels': schemas.TyresAndWheels,
+}
+
+def car_sections(sections: Optional[str] = Query(None, description="Comma separated sections to return, e.g. 'general,engine'. All sections by default.")):
+    """
+    Parses the sections of a sparse car response.
+
+    Args:
+        sections (str): The comma separated section names, None for every section.
+
+    Returns:
+        list: The requested section names, in response order.
+
+    Raises:
+        HTTPException: If a section is unknown, a 400 Bad Request Error is raised.
+    """
+    if sections is None:
+        return list(SECTION_SCHEMAS)
+    requested = {section.strip() for section in sections.split(',') if section.strip()}
+    unknown = requested - set(SECTION_SCHEMAS)
+    if unknown:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unknown section(s): {', '.join(sorted(unknown))}"
+        )
+    return [section for section in SECTION_SCHEMAS if section in requested]
+
+def load_sections(sections: list):
+    """
+    Returns the loader option reading only the requested section columns of the car documents.
+    """
+    document = db_models.CarDocument
+    return load_only(
+        document.car_id, document.general_id, document.created_at,
+        *[getattr(document, section) for section in sections]
+    )
+
+class CarQuery:
+    def __init__(
+            self,
+            brand: Optional[str] = None,
+            model: Optional[str] = None,
+            min_year: Optional[int] = Query(None, ge=0),
+            max_year: Optional[int] = Query(None, ge=0),
+            min_price: Optional[int] = Query(None, ge=0),
+            max_price: Optional[int] = Query(None, ge=0),
+            min_mileage: Optional[int] = Query(None, ge=0),
+            max_mileage: Optional[int] = Query(None, ge=0),
+            transmission: Optional[str] = None,
+            fuel_type: Optional[str] = None,
+            sort: str = Query('id', pattern=SORT_PATTERN)
+        ):
+        """
+        Query parameters of the car listing.
+
+        Args:
+            brand (str): Only the cars of this brand, e.g. 'Toyota'.
+            model (str): Only the cars of this model, e.g. 'Vios'.
+            min_year (int): The earliest manufacturing year.
+            max_year (int): The latest manufacturing year.
+            min_price (int): The lowest price in RM.
+            max_price (int): The highest price in RM.
+            min_mileage (int): The lowest mileage in km, compared with the low bound of the mileage range.
+            max_mileage (int): The highest mileage in km, compared with the high bound of the mileage range.
+            transmission (str): Only the cars with this transmission, e.g. 'Automatic'.
+            fuel_type (str): Only the cars using this fuel, e.g. 'Petrol - Unleaded (ULP)'.
+            sort (str): The sort key, one of `SORT_KEYS`, prefixed with '-' for descending order.
+        """
+        self.brand = brand
+        self.model = model
+        self.min_year = min_year
+        self.max_year = max_year
+        self.min_price = min_price
+        self.max_price = max_price
+        self.min_mileage = min_mileage
+        self.max_mileage = max_mileage
+        self.transmission = transmission
+        self.fuel_type = fuel_type
+        self.sort = sort
+
+    def key(self):
+        """
+        Returns the parameters as a hashable tuple, identifying the listing in the response cache.
+        """
+        return (
+            self.brand, self.model, self.min_year, self.max_year, self.min_price, self.max_price,
+            self.min_mileage, self.max_mileage, self.transmission, self.fuel_type, self.sort
+        )
+
+    @property
+    def sort_key(self):
+        return self.sort.lstrip('-')
+
+    @property
+    def sort_column(self):
+        return SORT_KEYS[self.sort_key]
+
+    @property
+    def descending(self):
+        return self.sort.startswith('-')
+
+    def _general_filters(self):
+        """
+        Returns the predicates on the 'general' table.
+        """
+        general = db_models.General
+        conditions = []
+        if self.brand is not None:
+            conditions.append(general.brand == self.brand)
+        if self.model is not None:
+            conditions.append(general.model == self.model)
+        if self.min_year is not None:
+            conditions.append(general.mfg_year_value >= self.min_year)
+        if self.max_year is not None:
+            conditions.append(general.mfg_year_value <= self.max_year)
+        if self.min_price is not None:
+            conditions.append(general.price_value >= self.min_price)
+        if self.max_price is not None:
+            conditions.append(general.price_value <= self.max_price)
+        if self.min_mileage is not None:
+            conditions.append(general.mileage_low >= self.min_mileage)
+        if self.max_mileage is not None:
+            conditions.append(general.mileage_high <= self.max_mileage)
+        return conditions
+
+    def statement(self, after: dict = None, sections: list = None):
+        """
+        Builds the query of the matching cars, in sort order, along with their sort value.
+
+        Cars without a value for the sort key (e.g. an unparsable price) are left out of the sorted
+        listing, as they have no place in its order.
+
+        Args:
+            after (dict): The position of the last car of the previous page, holding its 'id' and the
+                'value' of its sort key. None for the first page.
+            sections (list): The sections of the documents to load, None for every section.
+
+        Returns:
+            Select: The query selecting the CarDocument and the sort value of each car.
+        """
+        document = db_models.CarDocument
+        general = db_models.General
+        sort_column = self.sort_column
+        query = select(document, sort_column)
+        if sections is not None:
+            query = query.options(load_sections(sections))
+
+        """Ties are broken by the car id of the table sorted on, so the index (sort column, id) serves the order"""
+        general_filters = self._general_filters()
+        tie_break = document.general_id
+        if general_filters or self.sort_key != 'id':
+            query = query.join(general, general.id == document.general_id)
+            query = query.where(*general_filters)
+            tie_break = general.id
+        if self.transmission is not None:
+            query = query.join(db_models.Transmission, db_models.Transmission.general_id == document.general_id)
+            query = query.where(db_models.Transmission.transmission == self.transmission)
+        if self.fuel_type is not None:
+            query = query.join(db_models.Engine, db_models.Engine.general_id == document.general_id)
+            query = query.where(db_models.Engine.fuel_type == self.fuel_type)
+
+        if self.sort_key == 'id':
+            order = [document.general_id]
+        else:
+            order = [sort_column, tie_break]
+            query = query.where(sort_column != None)
+
+        """Keyset pagination: resume right after the (sort value, id) of the last car of the previous page"""
+        if after is not None:
+            if self.sort_key == 'id':
+                position = document.general_id < after['id'] if self.descending else document.general_id > after['id']
+            elif self.descending:
+                position = or_(sort_column < after['value'], and_(sort_column == after['value'], tie_break < after['id']))
+            else:
+                position = or_(sort_column > after['value'], and_(sort_column == after['value'], tie_break > after['id']))
+            query = query.where(position)
+
+        if self.descending:
+            return query.order_by(*[column.desc() for column in order])
+        return query.order_by(*order)
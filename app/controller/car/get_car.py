@@ -1,83 +1,197 @@
 import sys
-from fastapi import status, HTTPException, Depends
-from sqlalchemy.orm import Session
+from fastapi import status, HTTPException, Depends, Query, Request
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Optional
 import logging
 from ...database import db_models
-from ...database.db_setup import get_db
+from ...database.db_setup import get_async_read_db
+from ...utils.pagination import encode_cursor, decode_cursor
+from ...utils.response_cache import ResponseCache, cached_response
+from ...utils.single_flight import SingleFlight
+from ...config import settings
 from ... import schemas
+from .car_query import CarQuery, SECTION_SCHEMAS, car_sections, load_sections
 
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
 
-async def get_car_details(db: Session = Depends(get_db)):
+"""
+The car data only changes when a batch is ingested, so the serialized responses are cached and served
+for as long as the ingest generation they were built from is current.
+"""
+car_cache = ResponseCache(max_entries=settings.response_cache_size)
+
+"""
+Identical requests arriving together, e.g. when a dashboard refresh fans out to many clients, miss the
+cache together: the first one reads and serializes the response while the others wait for it.
+"""
+car_flights = SingleFlight()
+
+async def _current_generation(db: AsyncSession):
     """
-    Retrieves a list of car details from the database.
+    Returns the ingest generation of the car data, 0 before the first ingested batch.
+    """
+    generation = (await db.execute(
+        select(db_models.IngestGeneration.generation).where(db_models.IngestGeneration.id == 1)
+    )).scalar()
+    return generation or 0
+
+async def _read_through(key, generation: int, read):
+    """
+    Returns the cached response of a request, reading and caching it on a miss. Identical requests 
+    missing the cache together share a single read.
 
     Args:
-        db (Session): The database session.
+        key: The normalized parameters of the request.
+        generation (int): The current ingest generation.
+        read: Coroutine function reading the response model.
 
     Returns:
-        list[CarDetails]: A list of car details.
+        CachedResponse: The cached response.
+    """
+    entry = car_cache.get(key, generation)
+    if entry is None:
+        async def read_and_cache():
+            return car_cache.put(key, generation, await read())
+        entry = await car_flights.do((key, generation), read_and_cache)
+    return entry
+
+
+def _cursor_scalar(value, python_type):
+    """
+    Converts a value read from a cursor to the type of the column it is compared with.
 
     Raises:
+        TypeError: If the value is missing or not a scalar.
+        ValueError: If the value cannot be converted, or is out of the range of a database integer.
+    """
+    if value is None or isinstance(value, (bool, list, dict)):
+        raise TypeError(f"Invalid cursor value: {value!r}")
+    value = python_type(value)
+    if python_type is int and not -2 ** 63 <= value < 2 ** 63:
+        raise ValueError(f"Cursor value out of range: {value}")
+    return value
+
+def _car_details(car_document: db_models.CarDocument, sections: list):
+    """
+    Builds the CarDetails response of a car from its read model document, with the requested sections only.
+    """
+    return schemas.CarDetails(
+        id = car_document.car_id,
+        created_at = car_document.created_at,
+        **{section: SECTION_SCHEMAS[section](**getattr(car_document, section)) for section in sections}
+    )
+
+async def _car_page(limit: int, cursor: Optional[str], car_query: CarQuery, sections: list, db: AsyncSession):
+    """
+    Reads a page of car details matching the filters, see `get_car_details`.
+
+    Raises:
+        HTTPException: If the cursor is malformed, a 400 Bad Request Error is raised.
         HTTPException: If no shops are found, a 404 Not Found Error is raised.
-        HTTPException: If any other unexpected error occurs, a 500 Internal Server Error is raised.
     """
-    try: 
-        """Query the database to join Shop and ShopLocation tables and retrieve all records."""
-        car_details = db.query(
-            db_models.General, 
-            db_models.Transmission, 
-            db_models.Engine, 
-            db_models.DimensionAndWeight, 
-            db_models.Brakes, 
-            db_models.Suspension, 
-            db_models.Steering, 
-            db_models.TyresAndWheels
-        ).join(
-            db_models.Transmission, 
-            db_models.General.car_id == db_models.Transmission.car_id
-        ).join(
-            db_models.Engine, 
-            db_models.General.car_id == db_models.Engine.car_id
-        ).join(
-            db_models.DimensionAndWeight, 
-            db_models.General.car_id == db_models.DimensionAndWeight.car_id
-        ).join(
-            db_models.Brakes, 
-            db_models.General.car_id == db_models.Brakes.car_id
-        ).join(
-            db_models.Suspension, 
-            db_models.General.car_id == db_models.Suspension.car_id
-        ).join(
-            db_models.Steering, 
-            db_models.General.car_id == db_models.Steering.car_id
-        ).join(
-            db_models.TyresAndWheels, 
-            db_models.General.car_id == db_models.TyresAndWheels.car_id
-        ).all()
-        "If no shops are found, raise a 404 Not Found error."
-        if not car_details:
+    """Resume right after the last car of the previous page, which must have been sorted the same way."""
+    after = None
+    if cursor is not None:
+        try:
+            after = decode_cursor(cursor)
+            if after.get('sort') != car_query.sort:
+                raise ValueError(f"Cursor of another sort: {cursor}")
+            after['id'] = _cursor_scalar(after['id'], int)
+            if car_query.sort_key != 'id':
+                after['value'] = _cursor_scalar(after['value'], car_query.sort_column.type.python_type)
+        except (ValueError, KeyError, TypeError, OverflowError):
             raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND, 
-                detail="No car(s) found"
+                status_code=status.HTTP_400_BAD_REQUEST, 
+                detail="Invalid cursor"
             )
+
+    """Read the assembled cars from the read model instead of joining the eight tables. One extra row tells whether a next page exists."""
+    car_details = (await db.execute(car_query.statement(after, sections).limit(limit + 1))).all()
+    "If no shops are found, raise a 404 Not Found error."
+    if not car_details and cursor is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, 
+            detail="No car(s) found"
+        )
+    
+    next_cursor = None
+    if len(car_details) > limit:
+        car_details = car_details[:limit]
+        last_car, last_value = car_details[-1]
+        next_cursor = encode_cursor({'id': last_car.general_id, 'value': last_value, 'sort': car_query.sort})
+
+    result = []
+    for car_detail, _ in car_details:
+        car_result = _car_details(car_detail, sections)
+        result.append(car_result)
         
-        result = []
-        for car_detail in car_details:
-            car_result = schemas.CarDetails(
-                id = car_detail.General.car_id,
-                general=schemas.General(**car_detail.General.__dict__),
-                transmission = schemas.Transmission(**car_detail.Transmission.__dict__),
-                engine = schemas.Engine(**car_detail.Engine.__dict__),
-                dimension_and_weight = schemas.DimensionAndWeight(**car_detail.DimensionAndWeight.__dict__),
-                brakes = schemas.Brakes(**car_detail.Brakes.__dict__),
-                suspension = schemas.Suspension(**car_detail.Suspension.__dict__),
-                steering = schemas.Steering(**car_detail.Steering.__dict__),
-                tyres_and_wheels = schemas.TyresAndWheels(**car_detail.TyresAndWheels.__dict__),
-                created_at=car_detail.General.created_at
-            )
-            result.append(car_result)
-            
-        return result
+    return schemas.CarPage(items=result, next_cursor=next_cursor)
+
+async def _car_by_id(id: str, sections: list, db: AsyncSession):
+    """
+    Reads a single car, see `get_car_details_by_id`.
+
+    Raises:
+        HTTPException: If the specified shop is not found, a 404 Not Found Error is raised.
+    """
+    """Read the assembled car matching the given ID from the read model."""
+    car_detail = (await db.execute(
+        select(db_models.CarDocument)
+        .options(load_sections(sections))
+        .where(db_models.CarDocument.car_id == id)
+    )).scalars().first()
+
+    """If the shops is not found, raise a 404 Not Found error"""
+    if not car_detail:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, 
+            detail=f"Car with id of '{id}' not found"
+        )
+
+    """Unpack the document into CarDetails variables."""
+    return _car_details(car_detail, sections)
+
+async def get_car_details(
+        request: Request,
+        limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+        cursor: Optional[str] = None,
+        car_query: CarQuery = Depends(),
+        sections: list = Depends(car_sections),
+        db: AsyncSession = Depends(get_async_read_db)
+    ):
+    """
+    Retrieves a page of car details matching the filters from the database.
+
+    The cars are ordered by the sort key, ties broken by their indexed integer id, and paginated by 
+    keyset: the cursor holds the sort value and id of the last car of the previous page, so every page
+    is a bounded range scan whatever the size of the table.
+
+    Args:
+        request (Request): The request object, holding the If-None-Match header.
+        limit (int): The maximum number of cars of the page.
+        cursor (str): The `next_cursor` of the previous page, None for the first page.
+        car_query (CarQuery): The filters and sort key.
+        sections (list): The sections of the cars to return, only their columns are read.
+        db (AsyncSession): The database session.
+
+    Returns:
+        CarPage: The cars of the page and the cursor of the next page, None on the last page, with a 
+            strong ETag. 304 Not Modified if the client already holds the page.
+
+    Raises:
+        HTTPException: If the cursor is malformed, a 400 Bad Request Error is raised.
+        HTTPException: If no shops are found, a 404 Not Found Error is raised.
+        HTTPException: If any other unexpected error occurs, a 500 Internal Server Error is raised.
+    """
+    try: 
+        """Serve the page from the cache while no batch was ingested since it was built."""
+        generation = await _current_generation(db)
+        key = ('list', limit, cursor, car_query.key(), tuple(sections))
+        entry = await _read_through(key, generation, lambda: _car_page(limit, cursor, car_query, sections, db))
+
+        return cached_response(request, entry)
     
     except HTTPException as http_exception:
         raise http_exception
@@ -89,77 +203,35 @@ async def get_car_details(db: Session = Depends(get_db)):
             detail="Internal server error"
         )
 
-async def get_car_details_by_id(id: str, db: Session = Depends(get_db)):
+async def get_car_details_by_id(
+        request: Request,
+        id: str, 
+        sections: list = Depends(car_sections),
+        db: AsyncSession = Depends(get_async_read_db)
+    ):
     """
     Retrieves a single car and its details from the database based on the given ID.
 
     Args:
+        request (Request): The request object, holding the If-None-Match header.
         id (int): The ID of the car to retrieve.
-        db (Session): The database session.
+        sections (list): The sections of the car to return, only their columns are read.
+        db (AsyncSession): The database session.
 
     Returns:
-        CarDetails: The car details.
+        CarDetails: The car details, with a strong ETag. 304 Not Modified if the client already holds them.
 
     Raises:
         HTTPException: If the specified shop is not found, a 404 Not Found Error is raised.  
         HTTPException: If any other unexpected error occurs, a 500 Internal Server Error is raised.
     """
     try: 
-        """Query the database to join Shop and ShopLocation tables 
-        and retrieve the first record that matches the given shop ID."""
-        car_detail = db.query(
-            db_models.General, 
-            db_models.Transmission, 
-            db_models.Engine, 
-            db_models.DimensionAndWeight, 
-            db_models.Brakes, 
-            db_models.Suspension, 
-            db_models.Steering, 
-            db_models.TyresAndWheels
-        ).join(
-            db_models.Transmission, 
-            db_models.General.car_id == db_models.Transmission.car_id
-        ).join(
-            db_models.Engine, 
-            db_models.General.car_id == db_models.Engine.car_id
-        ).join(
-            db_models.DimensionAndWeight, 
-            db_models.General.car_id == db_models.DimensionAndWeight.car_id
-        ).join(
-            db_models.Brakes, 
-            db_models.General.car_id == db_models.Brakes.car_id
-        ).join(
-            db_models.Suspension, 
-            db_models.General.car_id == db_models.Suspension.car_id
-        ).join(
-            db_models.Steering, 
-            db_models.General.car_id == db_models.Steering.car_id
-        ).join(
-            db_models.TyresAndWheels, 
-            db_models.General.car_id == db_models.TyresAndWheels.car_id
-        ).filter(db_models.General.car_id==id).first()
-        
-        """If the shops is not found, raise a 404 Not Found error"""
-        if not car_detail:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND, 
-                detail=f"Car with id of '{id}' not found"
-            )
-
-        """Unpack the query result into CarDetails variables."""
-        result = schemas.CarDetails(
-            id = car_detail.General.car_id,
-            general=schemas.General(**car_detail.General.__dict__),
-            transmission = schemas.Transmission(**car_detail.Transmission.__dict__),
-            engine = schemas.Engine(**car_detail.Engine.__dict__),
-            dimension_and_weight = schemas.DimensionAndWeight(**car_detail.DimensionAndWeight.__dict__),
-            brakes = schemas.Brakes(**car_detail.Brakes.__dict__),
-            suspension = schemas.Suspension(**car_detail.Suspension.__dict__),
-            steering = schemas.Steering(**car_detail.Steering.__dict__),
-            tyres_and_wheels = schemas.TyresAndWheels(**car_detail.TyresAndWheels.__dict__)
-        )
+        """Serve the car from the cache while no batch was ingested since it was built."""
+        generation = await _current_generation(db)
+        key = ('car', id, tuple(sections))
+        entry = await _read_through(key, generation, lambda: _car_by_id(id, sections, db))
 
-        return result
+        return cached_response(request, entry)
     
     except HTTPException as http_exception:
         raise http_exception
@@ -0,0 +1,101 @@
+from fastapi import status, HTTPException, Depends, Request
+from sqlalchemy import select
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession
+import logging
+from ...database import db_models
+from ...database.db_setup import database_breaker, read_breakers, get_async_db
+from ...utils.rate_limiter import default_rate_limiter
+from ..car.get_car import car_cache, car_flights
+
+async def get_health():
+    """
+    Reports the health of the database connections, from the circuit breakers guarding the primary
+    database and each of its read replicas.
+
+    Returns:
+        dict: The overall status ("ok" while every circuit is closed, "degraded" otherwise), the 
+            circuit breaker states and counters, the counters of the car response cache, the car
+            reads in flight with their number of waiting requests, and the rate and wait times of the 
+            scraper rate limiter.
+
+    Raises:
+        HTTPException: If any unexpected error occurs, a 500 Internal Server Error is raised.
+    """
+    try:
+        database = database_breaker.metrics()
+        read_replicas = [breaker.metrics() for breaker in read_breakers]
+        healthy = all(metrics["state"] == "closed" for metrics in [database, *read_replicas])
+        return {
+            "status": "ok" if healthy else "degraded",
+            "database": database,
+            "read_replicas": read_replicas,
+            "response_cache": car_cache.metrics(),
+            "single_flight": car_flights.metrics(),
+            "rate_limiter": await default_rate_limiter().ametrics()
+        }
+
+    except Exception as e:
+        logging.error(f"An error occurred: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Internal server error"
+        )
+
+def _startup_scrape_state(request: Request):
+    """
+    Returns the state of the scrape started with the application.
+    """
+    task = getattr(request.app.state, "startup_scrape", None)
+    if task is None:
+        return "disabled"
+    if not task.done():
+        return "running"
+    if task.cancelled() or not task.result():
+        return "failed"
+    return "done"
+
+async def get_readiness(request: Request, db: AsyncSession = Depends(get_async_db)):
+    """
+    Reports whether the application is ready to serve car data.
+
+    Args:
+        request (Request): The request object, giving access to the application state.
+        db (AsyncSession): The database session.
+
+    Returns:
+        dict: The readiness status and the state of the startup scrape.
+
+    Raises:
+        HTTPException: If no car data is available yet, a 503 Service Unavailable error is raised.
+        HTTPException: If any other unexpected error occurs, a 500 Internal Server Error is raised.
+    """
+    try:
+        startup_scrape = _startup_scrape_state(request)
+        try:
+            """Check that the schema exists and holds at least one car"""
+            has_cars = (await db.execute(
+                select(db_models.CarDocument.id).limit(1)
+            )).first() is not None
+        except SQLAlchemyError as sqla_error:
+            logging.error("SQLAlchemy error occurred: {}".format(str(sqla_error)))
+            has_cars = False
+
+        """If no car is available yet, raise a 503 Service Unavailable error"""
+        if not has_cars:
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail={"status": "not ready", "startup_scrape": startup_scrape}
+            )
+
+        return {"status": "ready", "startup_scrape": startup_scrape}
+
+    except HTTPException as http_exception:
+        raise http_exception
+
+    except Exception as e:
+        logging.error(f"An error occurred: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Internal server error"
+        )
@@ -0,0 +1,52 @@
+"""
+One-off command creating the database and its tables, and bringing the schema of an existing database
+up to date. Run it before starting the application for the first time and after every upgrade:
+
+    python -m app.database.db_bootstrap
+
+Pass `--scrape N` to also scrape N cars into the database, outside of the application process.
+"""
+from sqlalchemy import create_engine, text
+import argparse
+import logging
+from . import db_models
+from .db_setup import get_engine, SQLALCHEMY_DATABASE_URL, ENGINE_OPTIONS
+from .db_migrations import run_migrations
+from ..config import settings
+
+def create_database():
+    """
+    Creates the MySQL database if it does not exist yet.
+    """
+    if get_engine().url.get_backend_name() != 'mysql':
+        return
+    server_engine = create_engine(SQLALCHEMY_DATABASE_URL, connect_args=ENGINE_OPTIONS["connect_args"])
+    try:
+        with server_engine.connect() as conn:
+            conn.execute(text(f"CREATE DATABASE IF NOT EXISTS {settings.database_name};"))
+    finally:
+        server_engine.dispose()
+
+def bootstrap():
+    """
+    Creates the database and the missing tables, then applies the migrations to the existing ones.
+    """
+    create_database()
+    db_models.Base.metadata.create_all(bind=get_engine())
+    run_migrations(get_engine())
+
+def main():
+    argument_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    argument_parser.add_argument('--scrape', type=int, default=0, help='number of cars to scrape once the schema is ready')
+    argument_parser.add_argument('--url', default=settings.startup_scrape_url, help='listing URL the scrape starts from')
+    arguments = argument_parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    bootstrap()
+    print("Database schema is up to date")
+    if arguments.scrape > 0:
+        from .db_init_values import initialize_table_data
+        initialize_table_data(url=arguments.url, limit=arguments.scrape)
+
+if __name__ == "__main__":
+    main()
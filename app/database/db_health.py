@@ -0,0 +1,163 @@
+import threading
+import asyncio
+import logging
+import time
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+class CircuitBreaker:
+    def __init__(
+            self,
+            failure_threshold: int = 3,
+            reset_timeout: float = 1.0,
+            max_reset_timeout: float = 30.0,
+            probe=None,
+            name: str = "Database"
+        ):
+        """
+        Circuit breaker guarding the database connection.
+
+        After `failure_threshold` consecutive failures the circuit opens and callers are turned away
+        immediately instead of waiting on a database that is down. Once `reset_timeout` has elapsed,
+        recovery is probed: by the `probe` coroutine in the background when an event loop is running,
+        otherwise by letting a single trial request through (half-open). A successful probe closes the
+        circuit, a failed one reopens it for twice as long, up to `max_reset_timeout`.
+
+        The breaker is safe to share between threads and asyncio tasks.
+
+        Args:
+            failure_threshold (int): The number of consecutive failures opening the circuit.
+            reset_timeout (float): The number of seconds the circuit stays open before recovery is probed.
+            max_reset_timeout (float): The longest the circuit stays open between two probes.
+            probe: Optional coroutine function checking whether the database is reachable again.
+            name (str): The name of the guarded database in the logs.
+        """
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.max_reset_timeout = max_reset_timeout
+        self.probe = probe
+        self.name = name
+        self._lock = threading.Lock()
+        self._probe_task = None
+
+        self.state = CLOSED
+        self.failures = 0
+        self.retry_at = 0.0
+        self._open_timeout = reset_timeout
+
+        self.rejected = 0
+        self.transitions = {OPEN: 0, HALF_OPEN: 0, CLOSED: 0}
+
+    def _transition(self, state: str):
+        """
+        Moves the circuit to a new state, counting the transition. Must hold the lock.
+        """
+        if state == self.state:
+            return
+        logging.warning(f"{self.name} circuit breaker {self.state} -> {state}")
+        self.state = state
+        self.transitions[state] += 1
+
+    def allow(self):
+        """
+        Tells whether a caller may use the database.
+
+        Returns:
+            bool: True if the circuit is closed, or if the caller is the trial request of a half-open
+                circuit; False if the caller should fail fast.
+        """
+        with self._lock:
+            if self.state == CLOSED:
+                return True
+            # A probe whose event loop is gone will never report back
+            probing = self._probe_task is not None and not self._probe_task.get_loop().is_closed()
+            if self.state == OPEN and not probing and time.monotonic() >= self.retry_at:
+                self._transition(HALF_OPEN)
+                return True
+            self.rejected += 1
+            return False
+
+    def retry_after(self):
+        """
+        Returns the number of seconds until recovery is next probed.
+        """
+        with self._lock:
+            return max(0.0, self.retry_at - time.monotonic())
+
+    def record_success(self):
+        """
+        Closes the circuit after a successful use of the database.
+        """
+        with self._lock:
+            self.failures = 0
+            self._open_timeout = self.reset_timeout
+            self._transition(CLOSED)
+
+    def record_failure(self):
+        """
+        Counts a failed use of the database, opening the circuit once the threshold is reached or when
+        the trial request of a half-open circuit failed.
+        """
+        with self._lock:
+            self.failures += 1
+            if self.state == OPEN or (self.state == CLOSED and self.failures < self.failure_threshold):
+                return
+            self.retry_at = time.monotonic() + self._open_timeout
+            self._open_timeout = min(self.max_reset_timeout, self._open_timeout * 2)
+            self._transition(OPEN)
+            self._start_probe()
+
+    def _start_probe(self):
+        """
+        Starts probing recovery in the background, if there is an event loop to run the probe on.
+        Must hold the lock.
+        """
+        if self.probe is None or (self._probe_task is not None and not self._probe_task.get_loop().is_closed()):
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        self._probe_task = loop.create_task(self._probe_until_closed())
+
+    async def _probe_until_closed(self):
+        """
+        Probes the database every time the circuit is due for a retry, until it is reachable again.
+        """
+        try:
+            while True:
+                await asyncio.sleep(self.retry_after())
+                with self._lock:
+                    if self.state != OPEN:
+                        return
+                    self._transition(HALF_OPEN)
+                try:
+                    await self.probe()
+                except Exception as e:
+                    logging.warning(f"{self.name} is still unreachable: {e}")
+                    self.record_failure()
+                else:
+                    self.record_success()
+                    return
+        finally:
+            with self._lock:
+                self._probe_task = None
+
+    def metrics(self):
+        """
+        Returns the state of the circuit and its counters.
+
+        Returns:
+            dict: The current state, the consecutive failures, the number of rejected callers, the
+                seconds until the next recovery probe and the number of transitions into each state.
+        """
+        with self._lock:
+            return {
+                'state': self.state,
+                'failures': self.failures,
+                'rejected': self.rejected,
+                'retry_after': max(0.0, self.retry_at - time.monotonic()) if self.state != CLOSED else 0.0,
+                'transitions': dict(self.transitions)
+            }
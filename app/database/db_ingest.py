@@ -0,0 +1,359 @@
+from sqlalchemy import select, update, func
+from sqlalchemy.dialects import mysql, postgresql, sqlite
+from sqlalchemy.orm import Session
+from sqlalchemy.engine import Connection
+from ..utils.utils import generate_unique_id
+from ..utils import spec_parser
+from . import db_models
+import hashlib
+
+DEFAULT_BATCH_SIZE = 500
+
+# Column of the 'general' table -> (section of the scraped car, label within the section)
+GENERAL_COLUMNS = {
+    'brand': ('GENERAL', 'Brand'),
+    'model': ('GENERAL', 'Model'),
+    'variant': ('GENERAL', 'Variant'),
+    'series': ('GENERAL', 'Series'),
+    'mfg_year': ('GENERAL', 'Mfg. Year'),
+    'mileage': ('GENERAL', 'Mileage'),
+    'type': ('GENERAL', 'Type'),
+    'seat_capacity': ('GENERAL', 'Seat Capacity'),
+    'country_of_origin': ('GENERAL', 'Country of Origin'),
+    'price': ('PRICE', 'Price'),
+}
+
+# Spec table -> (section of the scraped car, {column: label within the section})
+SPEC_TABLES = [
+    (db_models.Transmission, 'TRANSMISSION', {
+        'transmission': 'Transmission',
+    }),
+    (db_models.Engine, 'ENGINE', {
+        'engine_cc': 'Engine CC',
+        'compression_ratio': 'Compression Ratio',
+        'peak_power': 'Peak Power (KW)',
+        'peak_torque': 'Peak Torque (NM)',
+        'engine_type': 'Engine Type',
+        'fuel_type': 'Fuel Type',
+    }),
+    (db_models.DimensionAndWeight, 'DIMENSION & WEIGHT', {
+        'length': 'Length (mm)',
+        'width': 'Width (mm)',
+        'height': 'Height (mm)',
+        'wheel_base': 'Wheel Base (mm)',
+        'kerb_weight': 'Kerb Weight (kg)',
+        'fuel_tank': 'Fuel Tank (litres)',
+    }),
+    (db_models.Brakes, 'BRAKES', {
+        'front_brakes': 'Front Brakes',
+        'rear_brakes': 'Rear Brakes',
+    }),
+    (db_models.Suspension, 'SUSPENSION', {
+        'front_suspension': 'Front Suspension',
+        'rear_suspension': 'Rear Suspension',
+    }),
+    (db_models.Steering, 'STEERING', {
+        'steering': 'Steering',
+    }),
+    (db_models.TyresAndWheels, 'TYRES & WHEELS', {
+        'front_tyres': 'Front Tyres',
+        'rear_tyres': 'Rear Tyres',
+        'front_rims': 'Front Rims (inches)',
+        'rear_rims': 'Rear Rims (inches)',
+    }),
+]
+
+# Typed column -> (raw column it is parsed from, parser), for each table with typed columns
+TYPED_COLUMNS = {
+    db_models.General: {
+        'price_value': ('price', spec_parser.parse_price),
+        'mileage_low': ('mileage', spec_parser.parse_range_low),
+        'mileage_high': ('mileage', spec_parser.parse_range_high),
+        'mfg_year_value': ('mfg_year', spec_parser.parse_year),
+    },
+    db_models.Engine: {
+        'engine_cc_value': ('engine_cc', spec_parser.parse_int),
+        'peak_power_value': ('peak_power', spec_parser.parse_number),
+        'peak_torque_value': ('peak_torque', spec_parser.parse_number),
+    },
+    db_models.DimensionAndWeight: {
+        'length_value': ('length', spec_parser.parse_int),
+        'width_value': ('width', spec_parser.parse_int),
+        'height_value': ('height', spec_parser.parse_int),
+        'wheel_base_value': ('wheel_base', spec_parser.parse_int),
+        'kerb_weight_value': ('kerb_weight', spec_parser.parse_int),
+        'fuel_tank_value': ('fuel_tank', spec_parser.parse_number),
+    },
+}
+
+# Section of the car document -> table it is assembled from
+DOCUMENT_SECTIONS = {
+    'general': db_models.General,
+    'transmission': db_models.Transmission,
+    'engine': db_models.Engine,
+    'dimension_and_weight': db_models.DimensionAndWeight,
+    'brakes': db_models.Brakes,
+    'suspension': db_models.Suspension,
+    'steering': db_models.Steering,
+    'tyres_and_wheels': db_models.TyresAndWheels,
+}
+
+# Bookkeeping columns left out of the document sections
+DOCUMENT_SKIPPED_COLUMNS = ('id', 'car_id', 'general_id', 'listing_key', 'created_at')
+
+# Columns of the 'general' table identifying a car without an ad id
+NATURAL_KEY = ('brand', 'model', 'variant', 'series', 'mfg_year')
+
+UPSERT_DIALECTS = {
+    'mysql': mysql.insert,
+    'postgresql': postgresql.insert,
+    'sqlite': sqlite.insert,
+}
+
+def _general_row(car: dict):
+    """
+    Maps a scraped car onto the columns of the 'general' table.
+    """
+    return {
+        column: car.get(section, {}).get(label)
+        for column, (section, label) in GENERAL_COLUMNS.items()
+    }
+
+def _spec_row(car: dict, section: str, columns: dict):
+    """
+    Maps one section of a scraped car onto the columns of its spec table.
+    """
+    values = car.get(section, {})
+    return {column: values.get(label) for column, label in columns.items()}
+
+def typed_values(model, row: dict):
+    """
+    Parses the raw specification strings of a row into the typed columns of its table.
+
+    Args:
+        model: The model of the table the row belongs to.
+        row (dict): The raw column values of the row.
+
+    Returns:
+        dict: The value of every typed column of the table, None where the raw value is unparsable.
+    """
+    return {
+        typed_column: parser(row.get(raw_column))
+        for typed_column, (raw_column, parser) in TYPED_COLUMNS.get(model, {}).items()
+    }
+
+def natural_listing_key(general_row: dict):
+    """
+    Derives the listing key of a car from its brand, model, variant, series and manufacturing year.
+    """
+    values = '\x1f'.join(general_row.get(column) or '' for column in NATURAL_KEY)
+    return f"nk:{hashlib.sha1(values.encode('utf-8')).hexdigest()}"
+
+def ad_listing_key(ad_id: str):
+    """
+    Returns the listing key of a car whose Mudah ad id is known.
+    """
+    return f"ad:{ad_id}"
+
+def listing_key(car: dict, general_row: dict = None):
+    """
+    Returns the stable key identifying a scraped listing: its Mudah ad id when the details page carried
+    one, the hash of its natural key otherwise.
+    """
+    ad_id = car.get('LISTING', {}).get('Ad ID')
+    if ad_id:
+        return ad_listing_key(ad_id)
+    return natural_listing_key(general_row if general_row is not None else _general_row(car))
+
+def is_ad_stored(db: Session, ad_id: str):
+    """
+    Checks whether the car of a Mudah ad is already stored, looking its listing key up in the unique index.
+    """
+    return db.execute(
+        select(db_models.General.id).where(db_models.General.listing_key == ad_listing_key(ad_id))
+    ).first() is not None
+
+def upsert(db: Session, model, rows: list, key: str, update_values: dict = None):
+    """
+    Builds a multi-row INSERT updating the rows whose unique `key` already exists, using the native
+    upsert of the database (ON DUPLICATE KEY UPDATE on MySQL, ON CONFLICT on SQLite and PostgreSQL).
+
+    Args:
+        db: The database session or connection.
+        model: The model of the table written to.
+        rows (list): The rows to write, all with the same columns.
+        key (str): The unique column identifying a row.
+        update_values (dict): The values written to an existing row, e.g. expressions on its current 
+            values. By default, its columns are overwritten with the values of the row to write.
+
+    Returns:
+        The upsert statement.
+
+    Raises:
+        NotImplementedError: If the database has no supported upsert.
+    """
+    dialect = db.dialect.name if isinstance(db, Connection) else db.get_bind().dialect.name
+    if dialect not in UPSERT_DIALECTS:
+        raise NotImplementedError(f"Upserts are not supported on {dialect}")
+    statement = UPSERT_DIALECTS[dialect](model).values(rows)
+    # The car id of a stored car never changes, only its details are refreshed
+    update_columns = [column for column in rows[0] if column not in (key, 'car_id')]
+    if dialect == 'mysql':
+        return statement.on_duplicate_key_update(
+            update_values or {column: statement.inserted[column] for column in update_columns}
+        )
+    return statement.on_conflict_do_update(
+        index_elements=[key],
+        set_=update_values or {column: statement.excluded[column] for column in update_columns}
+    )
+
+def refresh_car_documents(db: Session, general_ids: list):
+    """
+    Assembles the read model documents of the given cars from the normalized tables, with a single
+    join, and upserts them into the 'car_document' table. The ingest generation is bumped, which
+    invalidates the cached API responses.
+
+    Args:
+        db: The database session or connection.
+        general_ids (list): The ids of the 'general' rows of the cars whose documents are (re)built.
+
+    Returns:
+        int: The number of documents written.
+    """
+    if not general_ids:
+        return 0
+    labelled_columns = [
+        column.label(f"{section}__{column.name}")
+        for section, model in DOCUMENT_SECTIONS.items()
+        for column in model.__table__.columns
+        if column.name not in DOCUMENT_SKIPPED_COLUMNS
+    ]
+    query = select(
+        db_models.General.id, db_models.General.car_id, db_models.General.created_at, *labelled_columns
+    )
+    for model in list(DOCUMENT_SECTIONS.values())[1:]:
+        query = query.join(model, db_models.General.id == model.general_id)
+    rows = db.execute(query.where(db_models.General.id.in_(general_ids))).mappings().all()
+
+    documents = []
+    for row in rows:
+        document = {'general_id': row['id'], 'car_id': row['car_id'], 'created_at': row['created_at']}
+        for section in DOCUMENT_SECTIONS:
+            document[section] = {}
+        for label, value in row.items():
+            if '__' in label:
+                section, column = label.split('__', 1)
+                document[section][column] = value
+        documents.append(document)
+    if documents:
+        db.execute(upsert(db, db_models.CarDocument, documents, 'general_id'))
+        bump_generation(db)
+    return len(documents)
+
+def bump_generation(db):
+    """
+    Counts a change of the car data in the 'ingest_generation' row, within the caller's transaction,
+    so every API worker stops serving the responses it cached before the change.
+
+    Args:
+        db: The database session or connection.
+    """
+    # A single upsert, so concurrent first ingests cannot both try to insert the row
+    db.execute(upsert(
+        db, db_models.IngestGeneration, [{'id': 1, 'generation': 1, 'updated_at': func.now()}], 'id',
+        update_values={'generation': db_models.IngestGeneration.generation + 1, 'updated_at': func.now()}
+    ))
+
+def _adopt_natural_keys(db: Session, cars: dict):
+    """
+    Re-keys the cars stored under their natural key (before the listing key existed, or scraped without
+    an ad id) to the ad id of the matching car of the batch, so they are refreshed instead of stored 
+    a second time. A stored car is left alone when its ad id is already taken.
+    """
+    general = db_models.General
+    ad_keys = {}
+    for key, (car, general_row) in cars.items():
+        natural_key = natural_listing_key(general_row)
+        if key != natural_key:
+            # Several ads may share a natural key, the stored car goes to the first one
+            ad_keys.setdefault(natural_key, key)
+    if not ad_keys:
+        return
+
+    natural_keys = db.execute(
+        select(general.listing_key).where(general.listing_key.in_(list(ad_keys)))
+    ).scalars().all()
+    if not natural_keys:
+        return
+    taken = set(db.execute(
+        select(general.listing_key).where(general.listing_key.in_([ad_keys[key] for key in natural_keys]))
+    ).scalars())
+    for natural_key in natural_keys:
+        if ad_keys[natural_key] not in taken:
+            db.execute(
+                update(general)
+                .where(general.listing_key == natural_key)
+                .values(listing_key=ad_keys[natural_key])
+            )
+
+def _upsert_batch(db: Session, cars: dict):
+    """
+    Writes a batch of cars, keyed by listing key, with one multi-row upsert per table.
+    """
+    _adopt_natural_keys(db, cars)
+    general_rows = [
+        {
+            'car_id': generate_unique_id(),
+            'listing_key': key,
+            **general_row,
+            **typed_values(db_models.General, general_row)
+        }
+        for key, (car, general_row) in cars.items()
+    ]
+    db.execute(upsert(db, db_models.General, general_rows, 'listing_key'))
+
+    # Cars that were already stored keep their ids, read them back to attach the spec rows
+    general_ids = dict(db.execute(
+        select(db_models.General.listing_key, db_models.General.id)
+        .where(db_models.General.listing_key.in_(list(cars)))
+    ).all())
+    for model, section, columns in SPEC_TABLES:
+        rows = []
+        for key, (car, general_row) in cars.items():
+            spec_row = _spec_row(car, section, columns)
+            rows.append({'general_id': general_ids[key], **spec_row, **typed_values(model, spec_row)})
+        db.execute(upsert(db, model, rows, 'general_id'))
+
+    refresh_car_documents(db, list(general_ids.values()))
+
+def bulk_upsert_cars(db: Session, car_details: list, batch_size: int = DEFAULT_BATCH_SIZE):
+    """
+    Inserts scraped cars in batches, refreshing the details of the cars that are already stored.
+
+    Each batch costs one SELECT looking up the cars stored under their natural key, one multi-row 
+    upsert for each of the eight tables, keyed by the unique listing key of the car and the unique 
+    general id of its spec rows, one SELECT reading the ids back, and one join rebuilding the documents
+    of the read model, then a commit.
+
+    Args:
+        db: The database session.
+        car_details (list): The car dictionaries produced by the web scraper.
+        batch_size (int): The number of cars written per batch.
+
+    Returns:
+        int: The number of cars inserted or updated.
+    """
+    written = 0
+    for start in range(0, len(car_details), batch_size):
+        cars = {}
+        for car in car_details[start:start + batch_size]:
+            general_row = _general_row(car)
+            # The same listing may also be scraped twice within the batch, the last one wins
+            cars[listing_key(car, general_row)] = (car, general_row)
+
+        if cars:
+            _upsert_batch(db, cars)
+        db.commit()
+        written += len(cars)
+
+    return written
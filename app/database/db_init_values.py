@@ -1,139 +1,146 @@
-import sys, logging
+import sys, logging, asyncio, threading
 from fastapi import status, HTTPException
 from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.orm import Session
 from ..utils.web_scraper import WebScraper
-from ..utils.utils import generate_unique_id
-from . import db_models
+from ..utils.pipeline import CrawlPipeline
+from ..utils.checkpoint import CrawlCheckpoint
+from .db_ingest import bulk_upsert_cars, is_ad_stored, DEFAULT_BATCH_SIZE
 from .db_setup import SessionLocal
 
-def car_exists(car_general, db: Session = SessionLocal()):
+# Cars of a crawl saved and committed at once, small so the first cars are visible and checkpointed early
+DEFAULT_FLUSH_SIZE = 50
+
+def save_car_details(car_details: list, db: Session, batch_size: int = DEFAULT_BATCH_SIZE):
     """
-    Checks if a car already exists in the database.
+    Adds a batch of scraped cars to the database and commits them, updating cars that already exist.
 
     Args:
+        car_details (list): The car dictionaries produced by the web scraper.
         db: The database session.
-        car_general: Dictionary containing general car information.
+        batch_size (int): The number of cars written per multi-row upsert and commit.
 
     Returns:
-        bool: True if the car exists, False otherwise.
+        int: The number of cars inserted or updated.
+    """
+    return bulk_upsert_cars(db, car_details, batch_size=batch_size)
+
+async def _save_car_details_async(
+        scraper: WebScraper, 
+        limit: int, 
+        flush_size: int, 
+        persist, 
+        stop: threading.Event = None
+    ):
+    """
+    Streams the cars of an asynchronous crawl into the database in batches of `flush_size`.
+    Writes run in a worker thread so the crawl keeps fetching while a batch is being saved.
     """
-    existing_car = db.query(db_models.General).filter(
-        db_models.General.brand == car_general.get('Brand'),
-        db_models.General.model == car_general.get('Model'),
-        db_models.General.variant == car_general.get('Variant'),
-        db_models.General.series == car_general.get('Series'),
-        db_models.General.mfg_year == car_general.get('Mfg. Year')
-    ).first()
-    if existing_car is not None:
-        return True
-    return False
-
-def initialize_table_data(url: str, limit: int = 50, db: Session = SessionLocal()):
+    batch = []
+    async for car in scraper.aiter_cars(limit=limit):
+        batch.append(car)
+        if len(batch) >= flush_size:
+            await asyncio.to_thread(persist, batch)
+            batch = []
+        if stop is not None and stop.is_set():
+            break
+    if batch:
+        await asyncio.to_thread(persist, batch)
+
+def initialize_table_data(
+        url: str, 
+        limit: int = 50, 
+        db: Session = None, 
+        mode: str = "sync", 
+        flush_size: int = DEFAULT_FLUSH_SIZE,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        checkpoint: CrawlCheckpoint = None,
+        stop_after_known: int = None,
+        use_listing_data: bool = False,
+        shards: list = None,
+        stop: threading.Event = None
+    ):
     """
     Initialize data in the 'Company' and 'Source' tables.
 
     This function adds data to the 'Company' and 'Source' tables if it does not already exist.
 
+    Args:
+        url (str): The listing URL to scrape the cars from.
+        limit (int): The maximum number of cars to scrape.
+        db: The database session, a new one is opened if not given.
+        mode (str): "sync" to fetch the pages one after another, "async" to fetch the detail pages 
+            concurrently, or "pipeline" to fetch, parse and save the cars in separate stages.
+        flush_size (int): The number of scraped cars saved and committed at once, after which the 
+            checkpoint is saved.
+        batch_size (int): The maximum number of cars per multi-row upsert statement, each table
+            receiving one upsert per batch.
+        checkpoint (CrawlCheckpoint): Optional crawl frontier, saved after every committed batch so an 
+            interrupted crawl resumes where it stopped. Not used in pipeline mode.
+        stop_after_known (int): Stop paginating once this many consecutive already stored ads are seen. 
+            An ad counts as stored when the database holds its listing key.
+        use_listing_data (bool): Only fetch the detail pages of ads that are new or whose listing summary 
+            changed since the checkpoint recorded them. Not supported in pipeline mode.
+        shards (list): Query parameters splitting the listing into shards walked concurrently in async mode.
+        stop (threading.Event): Optional event ending the crawl early when set, e.g. on application shutdown. 
+            The cars scraped so far are saved.
+
     Returns:
         None
     """
 
+    if db is None:
+        db = SessionLocal()
+
+    def is_known(ad_id):
+        """Short lived session per lookup, as the async crawl asks while a batch is being written"""
+        with Session(bind=db.get_bind()) as lookup_db:
+            return is_ad_stored(lookup_db, ad_id)
+
     try:
         """Initialize data for the 'Shop' and 'ShopLocation' table"""
         print("Initializing....")
-        car_details = WebScraper(url=url).scrap_all_cars(limit=limit)
-        for car in car_details:
-            """Add the car details into database"""
-            car_general = car.get('GENERAL', {})
-            if car_exists(car_general=car_general):
-                print("Car already exists in the database, skipping...")
-                continue
-            car_price = car.get('PRICE', {})
-            car_transmission = car.get('TRANSMISSION', {})
-            car_engine = car.get('ENGINE', {})
-            car_dimension_and_weight = car.get('DIMENSION & WEIGHT', {})
-            car_brakes = car.get('BRAKES', {})
-            car_suspension = car.get('SUSPENSION', {})
-            car_steering = car.get('STEERING', {})
-            car_tyres_and_wheels = car.get('TYRES & WHEELS', {})
-
-            car_id = generate_unique_id()
-            new_car_general = db_models.General(
-                car_id = car_id,
-                brand = car_general.get('Brand'),
-                model = car_general.get('Model'),
-                variant = car_general.get('Variant'),
-                series = car_general.get('Series'),
-                mfg_year = car_general.get('Mfg. Year'),
-                mileage = car_general.get('Mileage'),
-                type = car_general.get('Type'),
-                seat_capacity = car_general.get('Seat Capacity'),
-                country_of_origin = car_general.get('Country of Origin'),
-                price = car_price.get('Price')
-            )
-            db.add(new_car_general)
-            db.flush()
-
-            new_car_transmission = db_models.Transmission(
-                car_id = car_id,
-                transmission = car_transmission.get('Transmission')
-            )
-            db.add(new_car_transmission)
-
-            new_car_engine = db_models.Engine(
-                car_id = car_id,
-                engine_cc = car_engine.get('Engine CC'),
-                compression_ratio = car_engine.get('Compression Ratio'),
-                peak_power = car_engine.get('Peak Power (KW)'),
-                peak_torque = car_engine.get('Peak Torque (NM)'),
-                engine_type = car_engine.get('Engine Type'),
-                fuel_type = car_engine.get('Fuel Type')
-            )
-            db.add(new_car_engine)
-
-            new_car_dimension_and_weight = db_models.DimensionAndWeight(
-                car_id = car_id,
-                length = car_dimension_and_weight.get('Length (mm)'),
-                width = car_dimension_and_weight.get('Width (mm)'),
-                height = car_dimension_and_weight.get('Height (mm)'),
-                wheel_base = car_dimension_and_weight.get('Wheel Base (mm)'),
-                kerb_weight = car_dimension_and_weight.get('Kerb Weight (kg)'),
-                fuel_tank = car_dimension_and_weight.get('Fuel Tank (litres)')
-            )
-            db.add(new_car_dimension_and_weight)
-
-            new_car_brakes = db_models.Brakes(
-                car_id = car_id,
-                front_brakes = car_brakes.get('Front Brakes'),
-                rear_brakes = car_brakes.get('Rear Brakes'),
-            )
-            db.add(new_car_brakes)
-
-            new_car_suspension = db_models.Suspension(
-                car_id = car_id,
-                front_suspension = car_suspension.get('Front Suspension'),
-                rear_suspension = car_suspension.get('Rear Suspension'),
-            )
-            db.add(new_car_suspension)
-
-            new_car_steering = db_models.Steering(
-                car_id = car_id,
-                steering = car_steering.get('Steering'),
-            )
-            db.add(new_car_steering)
-
-            new_car_tyres_and_wheels = db_models.TyresAndWheels(
-                car_id = car_id,
-                front_tyres = car_tyres_and_wheels.get('Front Tyres'),
-                rear_tyres = car_tyres_and_wheels.get('Rear Tyres'),
-                front_rims = car_tyres_and_wheels.get('Front Rims (inches)'),
-                rear_rims = car_tyres_and_wheels.get('Rear Rims (inches)'),
-            )
-            db.add(new_car_tyres_and_wheels)
-                
-        """Commit the changes to the database"""
-        db.commit()
+        scraper = WebScraper(
+            url=url, 
+            checkpoint=checkpoint, 
+            stop_after_known=stop_after_known,
+            is_known=is_known,
+            use_listing_data=use_listing_data,
+            shards=shards
+        )
+
+        def persist(batch):
+            """Only move the checkpoint forward once the batch is committed"""
+            save_car_details(batch, db=db, batch_size=batch_size)
+            if checkpoint is not None:
+                checkpoint.save()
+
+        if mode == "pipeline":
+            """Fetch, parse and persist concurrently, writing the cars in batches"""
+            CrawlPipeline(
+                scraper=scraper,
+                persist=persist,
+                batch_size=flush_size
+            ).run(limit=limit, stop=stop)
+        elif mode == "async":
+            asyncio.run(_save_car_details_async(scraper, limit, flush_size, persist, stop=stop))
+        elif mode == "sync":
+            """Save the cars in batches as they are scraped instead of after the whole crawl"""
+            batch = []
+            for car in scraper.iter_cars(limit=limit):
+                batch.append(car)
+                if len(batch) >= flush_size:
+                    persist(batch)
+                    batch = []
+                if stop is not None and stop.is_set():
+                    break
+            if batch:
+                persist(batch)
+        else:
+            raise ValueError(f"Unknown scraping mode: {mode}")
+
+        if checkpoint is not None:
+            checkpoint.save()
 
     except SQLAlchemyError as sqla_error:
         logging.error("SQLAlchemy error occurred: {}".format(str(sqla_error)), exc_info=True)
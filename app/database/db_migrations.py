@@ -0,0 +1,221 @@
+import logging
+from sqlalchemy import MetaData, Table, and_, bindparam, delete, inspect, select, text, update
+from sqlalchemy.schema import AddConstraint, DropConstraint
+from sqlalchemy.engine import Connection
+from . import db_models
+from .db_ingest import (
+    natural_listing_key, typed_values, refresh_car_documents,
+    NATURAL_KEY, SPEC_TABLES, TYPED_COLUMNS, DEFAULT_BATCH_SIZE
+)
+
+"""
+`create_all` only creates missing tables, so columns and indexes added to existing tables are
+applied here. Every migration checks the live schema first, so running them again is a no-op.
+"""
+
+def _column_names(connection: Connection, table: str):
+    return {column['name'] for column in inspect(connection).get_columns(table)}
+
+def _index_names(connection: Connection, table: str):
+    return {index['name'] for index in inspect(connection).get_indexes(table)}
+
+def add_column(connection: Connection, model, name: str):
+    """
+    Adds a column declared on a model to its existing table, if it is missing.
+
+    Returns:
+        bool: True if the column was added.
+    """
+    table = model.__table__
+    if name in _column_names(connection, table.name):
+        return False
+    column_type = table.columns[name].type.compile(dialect=connection.dialect)
+    connection.execute(text(f"ALTER TABLE {table.name} ADD COLUMN {name} {column_type}"))
+    logging.info(f"Added column {table.name}.{name}")
+    return True
+
+def create_indexes(connection: Connection, model, columns: list = None):
+    """
+    Creates the indexes declared on a model that its existing table is missing.
+
+    Args:
+        connection (Connection): The connection to the database.
+        model: The model declaring the indexes.
+        columns (list): If given, only the indexes covering one of these columns are created.
+    """
+    existing = _index_names(connection, model.__table__.name)
+    for index in model.__table__.indexes:
+        if columns is not None and not any(column.name in columns for column in index.columns):
+            continue
+        if index.name not in existing:
+            index.create(connection)
+            logging.info(f"Created index {index.name}")
+
+def drop_column(connection: Connection, table_name: str, name: str):
+    """
+    Drops a column of an existing table, along with the foreign keys and indexes covering it.
+    """
+    table = Table(table_name, MetaData(), autoload_with=connection)
+    for constraint in table.foreign_key_constraints:
+        if name in constraint.column_keys:
+            connection.execute(DropConstraint(constraint))
+    for index in table.indexes:
+        if name in [column.name for column in index.columns]:
+            index.drop(connection)
+    connection.execute(text(f"ALTER TABLE {table_name} DROP COLUMN {name}"))
+    logging.info(f"Dropped column {table_name}.{name}")
+
+def rebuild_table(connection: Connection, model):
+    """
+    Recreates the existing table of a model with the model's schema, copying over the columns the model
+    keeps. SQLite cannot drop a column covered by a constraint, nor add a constraint, in place.
+    """
+    table = model.__table__
+    legacy_name = f"_legacy_{table.name}"
+    connection.execute(text(f"ALTER TABLE {table.name} RENAME TO {legacy_name}"))
+    for index in inspect(connection).get_indexes(legacy_name):
+        if index['name']:
+            connection.execute(text(f"DROP INDEX {index['name']}"))
+    table.create(connection)
+    columns = ", ".join(column.name for column in table.columns if column.name in _column_names(connection, legacy_name))
+    connection.execute(text(f"INSERT INTO {table.name} ({columns}) SELECT {columns} FROM {legacy_name}"))
+    connection.execute(text(f"DROP TABLE {legacy_name}"))
+    logging.info(f"Rebuilt table {table.name}")
+
+def add_listing_key(connection: Connection):
+    """
+    Adds the unique listing key of the 'general' table, keying the cars stored before it existed by
+    their natural key. Older databases may hold several rows of the same car: the first one takes the
+    natural key, the others are keyed 'legacy:<id>' so the unique index can be built.
+    """
+    add_column(connection, db_models.General, 'listing_key')
+    general = db_models.General.__table__
+    rows = connection.execute(
+        select(general.c.id, *[general.c[column] for column in NATURAL_KEY])
+        .where(general.c.listing_key == None)
+        .order_by(general.c.id)
+    ).all()
+    natural_keys = {row.id: natural_listing_key(row._asdict()) for row in rows}
+    taken = set(connection.execute(
+        select(general.c.listing_key).where(general.c.listing_key.like('nk:%'))
+    ).scalars())
+    backfill = []
+    for row_id, natural_key in natural_keys.items():
+        key = natural_key if natural_key not in taken else f"legacy:{row_id}"
+        taken.add(key)
+        backfill.append({'_id': row_id, 'listing_key': key})
+    if backfill:
+        connection.execute(
+            update(general)
+            .where(general.c.id == bindparam('_id'))
+            .values(listing_key=bindparam('listing_key')),
+            backfill
+        )
+        logging.info(f"Keyed {len(backfill)} general rows by their natural key")
+    # Only the listing key index: the other indexes of 'general' cover columns added by later migrations
+    create_indexes(connection, db_models.General, columns=['listing_key'])
+
+def add_typed_columns(connection: Connection):
+    """
+    Adds the typed columns parsed from the raw specification strings and backfills them for the rows
+    stored before they existed.
+    """
+    for model, typed_columns in TYPED_COLUMNS.items():
+        for typed_column in typed_columns:
+            add_column(connection, model, typed_column)
+
+        table = model.__table__
+        raw_columns = {raw_column for raw_column, _ in typed_columns.values()}
+        rows = connection.execute(
+            select(table.c.id, *[table.c[column] for column in raw_columns])
+            .where(and_(*[table.c[column] == None for column in typed_columns]))
+        ).all()
+        backfill = [{'_id': row.id, **typed_values(model, row._asdict())} for row in rows]
+        if backfill:
+            connection.execute(
+                update(table)
+                .where(table.c.id == bindparam('_id'))
+                .values({column: bindparam(column) for column in typed_columns}),
+                backfill
+            )
+            logging.info(f"Backfilled the typed columns of {len(backfill)} {table.name} rows")
+
+def use_integer_keys(connection: Connection):
+    """
+    Moves the spec tables from the string car id of the 'general' table onto its integer id, which
+    keeps their keys small and ordered. The string car id stays on 'general' as the public id.
+
+    The 'car_document' read model is derived data, so an outdated table is recreated empty and
+    rebuilt by `build_car_documents`.
+    """
+    for model, _, _ in SPEC_TABLES:
+        table = model.__table__
+        if 'car_id' not in _column_names(connection, table.name):
+            continue
+        add_column(connection, model, 'general_id')
+        legacy_table = Table(table.name, MetaData(), autoload_with=connection)
+        connection.execute(
+            update(legacy_table).values(
+                general_id=select(db_models.General.id)
+                .where(db_models.General.car_id == legacy_table.c.car_id)
+                .scalar_subquery()
+            )
+        )
+        # Rows whose car no longer exists cannot be migrated
+        connection.execute(delete(legacy_table).where(legacy_table.c.general_id == None))
+        if connection.dialect.name == 'sqlite':
+            rebuild_table(connection, model)
+        else:
+            drop_column(connection, table.name, 'car_id')
+            if connection.dialect.name == 'mysql':
+                connection.execute(text(f"ALTER TABLE {table.name} MODIFY general_id INTEGER NOT NULL"))
+            create_indexes(connection, model)
+            for constraint in table.foreign_key_constraints:
+                connection.execute(AddConstraint(constraint))
+        logging.info(f"Moved {table.name} onto general.id")
+
+    document_table = db_models.CarDocument.__table__
+    if inspect(connection).has_table(document_table.name) and \
+            'general_id' not in _column_names(connection, document_table.name):
+        document_table.drop(connection)
+        document_table.create(connection)
+
+def build_car_documents(connection: Connection):
+    """
+    Builds the read model documents of the cars stored before the 'car_document' table existed.
+    """
+    general_ids = connection.execute(
+        select(db_models.General.id)
+        .outerjoin(db_models.CarDocument, db_models.General.id == db_models.CarDocument.general_id)
+        .where(db_models.CarDocument.id == None)
+    ).scalars().all()
+    for start in range(0, len(general_ids), DEFAULT_BATCH_SIZE):
+        refresh_car_documents(connection, general_ids[start:start + DEFAULT_BATCH_SIZE])
+    if general_ids:
+        logging.info(f"Built the documents of {len(general_ids)} cars")
+
+def add_listing_indexes(connection: Connection):
+    """
+    Creates the composite indexes backing the filters and sorts of the car listing.
+    """
+    for model in (db_models.General, db_models.Transmission, db_models.Engine):
+        create_indexes(connection, model)
+
+MIGRATIONS = [
+    add_listing_key,
+    add_typed_columns,
+    use_integer_keys,
+    build_car_documents,
+    add_listing_indexes,
+]
+
+def run_migrations(engine):
+    """
+    Brings the schema of an existing database up to date with the models.
+
+    Args:
+        engine: The engine of the database to migrate.
+    """
+    with engine.begin() as connection:
+        for migration in MIGRATIONS:
+            migration(connection)
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, ForeignKey
+from sqlalchemy import Column, Integer, SmallInteger, Float, String, Text, ForeignKey, JSON, Index
 from sqlalchemy.dialects.mysql import LONGTEXT
 from sqlalchemy.sql.expression import text
 from sqlalchemy.sql.sqltypes import DATETIME
@@ -6,9 +6,18 @@ from .db_setup import Base
     
 class General(Base):
     __tablename__ = "general"
+    __table_args__ = (
+        # Filters and keyset sorts of the car listing, see `app/controller/car/car_query.py`
+        Index('ix_general_brand_model_year', 'brand', 'model', 'mfg_year_value'),
+        Index('ix_general_brand_price', 'brand', 'price_value', 'id'),
+        Index('ix_general_price', 'price_value', 'id'),
+        Index('ix_general_year', 'mfg_year_value', 'id'),
+        Index('ix_general_mileage', 'mileage_low', 'id'),
+    )
 
     id = Column(Integer, primary_key=True, nullable=False)
     car_id = Column(String(255), unique=True, nullable=False)
+    listing_key = Column(String(255), unique=True, index=True)
     brand = Column(String(255))
     model = Column(String(255))
     variant = Column(String(255))
@@ -19,47 +28,66 @@ class General(Base):
     seat_capacity = Column(String(255))
     country_of_origin = Column(String(255))
     price = Column(String(255))
+    price_value = Column(Integer)
+    mileage_low = Column(Integer)
+    mileage_high = Column(Integer)
+    mfg_year_value = Column(SmallInteger)
     created_at = Column(DATETIME(timezone=True), server_default=text('CURRENT_TIMESTAMP'), nullable=False)
 
 class Transmission(Base):
     __tablename__ = "transmission"
+    __table_args__ = (
+        Index('ix_transmission_transmission', 'transmission', 'general_id'),
+    )
 
     id = Column(Integer, primary_key=True, nullable=False)
-    car_id = Column(String(255), ForeignKey('general.car_id'), nullable=False)
+    general_id = Column(Integer, ForeignKey('general.id'), unique=True, index=True, nullable=False)
     transmission = Column(String(255))
     created_at = Column(DATETIME(timezone=True), server_default=text('CURRENT_TIMESTAMP'), nullable=False)
 
 class Engine(Base):
     __tablename__ = "engine"
+    __table_args__ = (
+        Index('ix_engine_fuel_type', 'fuel_type', 'general_id'),
+    )
 
     id = Column(Integer, primary_key=True, nullable=False)
-    car_id = Column(String(255), ForeignKey('general.car_id'), nullable=False)
+    general_id = Column(Integer, ForeignKey('general.id'), unique=True, index=True, nullable=False)
     engine_cc = Column(String(255))
     compression_ratio = Column(String(255))
     peak_power = Column(String(255))
     peak_torque = Column(String(255))
     engine_type = Column(String(255))
     fuel_type = Column(String(255))
+    engine_cc_value = Column(Integer)
+    peak_power_value = Column(Float)
+    peak_torque_value = Column(Float)
     created_at = Column(DATETIME(timezone=True), server_default=text('CURRENT_TIMESTAMP'), nullable=False)
 
 class DimensionAndWeight(Base):
     __tablename__ = "dimension_and_weight"
 
     id = Column(Integer, primary_key=True, nullable=False)
-    car_id = Column(String(255), ForeignKey('general.car_id'), nullable=False)
+    general_id = Column(Integer, ForeignKey('general.id'), unique=True, index=True, nullable=False)
     length = Column(String(255))
     width = Column(String(255))
     height = Column(String(255))
     wheel_base = Column(String(255))
     kerb_weight = Column(String(255))
     fuel_tank = Column(String(255))
+    length_value = Column(Integer)
+    width_value = Column(Integer)
+    height_value = Column(Integer)
+    wheel_base_value = Column(Integer)
+    kerb_weight_value = Column(Integer)
+    fuel_tank_value = Column(Float)
     created_at = Column(DATETIME(timezone=True), server_default=text('CURRENT_TIMESTAMP'), nullable=False)
 
 class Brakes(Base):
     __tablename__ = "brakes"
 
     id = Column(Integer, primary_key=True, nullable=False)
-    car_id = Column(String(255), ForeignKey('general.car_id'), nullable=False)
+    general_id = Column(Integer, ForeignKey('general.id'), unique=True, index=True, nullable=False)
     front_brakes = Column(String(255))
     rear_brakes = Column(String(255))
     created_at = Column(DATETIME(timezone=True), server_default=text('CURRENT_TIMESTAMP'), nullable=False)
@@ -68,7 +96,7 @@ class Suspension(Base):
     __tablename__ = "suspension"
 
     id = Column(Integer, primary_key=True, nullable=False)
-    car_id = Column(String(255), ForeignKey('general.car_id'), nullable=False)
+    general_id = Column(Integer, ForeignKey('general.id'), unique=True, index=True, nullable=False)
     front_suspension = Column(String(255))
     rear_suspension = Column(String(255))
     created_at = Column(DATETIME(timezone=True), server_default=text('CURRENT_TIMESTAMP'), nullable=False)
@@ -77,7 +105,7 @@ class Steering(Base):
     __tablename__ = "steering"
 
     id = Column(Integer, primary_key=True, nullable=False)
-    car_id = Column(String(255), ForeignKey('general.car_id'), nullable=False)
+    general_id = Column(Integer, ForeignKey('general.id'), unique=True, index=True, nullable=False)
     steering = Column(String(255))
     created_at = Column(DATETIME(timezone=True), server_default=text('CURRENT_TIMESTAMP'), nullable=False)
 
@@ -85,17 +113,47 @@ class TyresAndWheels(Base):
     __tablename__ = "tyres_and_wheels"
 
     id = Column(Integer, primary_key=True, nullable=False)
-    car_id = Column(String(255), ForeignKey('general.car_id'), nullable=False)
+    general_id = Column(Integer, ForeignKey('general.id'), unique=True, index=True, nullable=False)
     front_tyres = Column(String(255))
     rear_tyres = Column(String(255))
     front_rims = Column(String(255))
     rear_rims = Column(String(255))
     created_at = Column(DATETIME(timezone=True), server_default=text('CURRENT_TIMESTAMP'), nullable=False)
 
+class CarDocument(Base):
+    """
+    Read model holding every section of a car, assembled from the tables above at ingest time.
+    """
+    __tablename__ = "car_document"
+
+    id = Column(Integer, primary_key=True, nullable=False)
+    general_id = Column(Integer, ForeignKey('general.id'), unique=True, index=True, nullable=False)
+    car_id = Column(String(255), unique=True, index=True, nullable=False)
+    general = Column(JSON, nullable=False)
+    transmission = Column(JSON, nullable=False)
+    engine = Column(JSON, nullable=False)
+    dimension_and_weight = Column(JSON, nullable=False)
+    brakes = Column(JSON, nullable=False)
+    suspension = Column(JSON, nullable=False)
+    steering = Column(JSON, nullable=False)
+    tyres_and_wheels = Column(JSON, nullable=False)
+    created_at = Column(DATETIME(timezone=True), server_default=text('CURRENT_TIMESTAMP'), nullable=False)
+
+class IngestGeneration(Base):
+    """
+    Single row counting the changes of the car data, bumped by every ingested batch. Responses cached
+    under an older generation are stale.
+    """
+    __tablename__ = "ingest_generation"
+
+    id = Column(Integer, primary_key=True, nullable=False)
+    generation = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DATETIME(timezone=True), server_default=text('CURRENT_TIMESTAMP'), nullable=False)
+
 class ApiKey(Base):
     __tablename__ = "api_key"
 
     id = Column(Integer, primary_key=True, nullable=False)
     apiKey_id = Column(String(255), unique=True, nullable=False)
-    apiKey = Column(LONGTEXT, nullable=False)
+    apiKey = Column(Text().with_variant(LONGTEXT, "mysql"), nullable=False)
     created_at = Column(DATETIME(timezone=True), server_default=text('CURRENT_TIMESTAMP'), nullable=False)
\ No newline at end of file
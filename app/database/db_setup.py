@@ -1,75 +1,336 @@
-from sqlalchemy import create_engine, text
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.engine import make_url
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import sessionmaker, Session
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession, AsyncEngine
 from sqlalchemy.exc import SQLAlchemyError
+from fastapi import status, HTTPException
 from ..config import settings
-import time, logging
+from .db_health import CircuitBreaker
+from contextlib import asynccontextmanager
+import logging, asyncio, threading, itertools, functools, sqlite3
 
 MAX_RETRIES = 3
-RETRY_INTERVAL = 5
+RETRY_INTERVAL = 0.1
+
+# Async driver used for each database backend
+ASYNC_DRIVERS = {
+    'mysql': 'mysql+aiomysql',
+    'sqlite': 'sqlite+aiosqlite',
+}
+
+# Pragmas applied to every SQLite connection: WAL lets readers work while the ingestion writes
+SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'foreign_keys': 'ON',
+    'busy_timeout': 5000,
+    'cache_size': -64000,
+    'temp_store': 'MEMORY',
+}
+
+# A named shared-cache database, so the sync and async engines see the same in-memory data
+SQLITE_MEMORY_URI = "file:tekkis?mode=memory&cache=shared"
 
 SQLALCHEMY_DATABASE_URL = f"mysql://{settings.database_username}:{settings.database_password}@{settings.database_hostname}:{settings.database_port}"
-engine = create_engine(
-    SQLALCHEMY_DATABASE_URL, 
-    connect_args={"init_command": "SET time_zone='+08:00'"}, 
-    pool_pre_ping=True,
-    pool_size=100, 
-    max_overflow=50, 
-    pool_timeout=10
-)
-
-with engine.connect() as conn:
-    existing_databases = conn.execute(text("SHOW DATABASES;")).fetchall()
-    if (settings.database_name,) not in existing_databases:
-        conn.execute(text(f"CREATE DATABASE {settings.database_name};"))
-
-engine = create_engine(
-    SQLALCHEMY_DATABASE_URL+f"/{settings.database_name}", 
-    connect_args={"init_command": "SET time_zone='+08:00'"}, 
-    pool_pre_ping=True,
-    pool_size=100, 
-    max_overflow=50, 
-    pool_timeout=10
-)
-
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+def _pool_options(pool_size: int, max_overflow: int):
+    """
+    Returns the MySQL engine options of a connection pool of the given size.
+    """
+    return {
+        "connect_args": {"init_command": "SET time_zone='+08:00'"}, 
+        "pool_pre_ping": True,
+        "pool_size": pool_size, 
+        "max_overflow": max_overflow, 
+        "pool_timeout": 10
+    }
+
+if settings.database_backend == "sqlite":
+    if settings.sqlite_path == ":memory:":
+        DATABASE_URL = f"sqlite:///{SQLITE_MEMORY_URI}&uri=true"
+    else:
+        DATABASE_URL = f"sqlite:///{settings.sqlite_path}"
+    ENGINE_OPTIONS = {
+        "connect_args": {"check_same_thread": False}
+    }
+    # A SQLite file has no replicas, every read goes to the database itself
+    READ_URLS = []
+    READ_ENGINE_OPTIONS = ENGINE_OPTIONS
+elif settings.database_backend == "mysql":
+    DATABASE_URL = SQLALCHEMY_DATABASE_URL + f"/{settings.database_name}"
+    ENGINE_OPTIONS = _pool_options(settings.database_pool_size, settings.database_max_overflow)
+    # The read replicas share the credentials, port and schema name of the primary
+    READ_URLS = [
+        f"mysql://{settings.database_username}:{settings.database_password}@{hostname.strip()}:{settings.database_port}/{settings.database_name}"
+        for hostname in settings.database_read_hostnames.split(",") if hostname.strip()
+    ]
+    READ_ENGINE_OPTIONS = _pool_options(settings.database_read_pool_size, settings.database_read_max_overflow)
+else:
+    raise ValueError(f"Unknown database backend: {settings.database_backend}")
+
+def _set_sqlite_pragmas(dbapi_connection, connection_record):
+    """
+    Applies `SQLITE_PRAGMAS` to a new SQLite connection.
+    """
+    cursor = dbapi_connection.cursor()
+    for name, value in SQLITE_PRAGMAS.items():
+        cursor.execute(f"PRAGMA {name}={value}")
+    cursor.close()
+
+def _configure_engine(engine):
+    """
+    Registers the backend specific connection setup of an engine.
+    """
+    if engine.url.get_backend_name() == 'sqlite':
+        event.listen(engine, "connect", _set_sqlite_pragmas)
+    return engine
+
+"""
+The engines are only created the first time a session needs a connection, so importing the application
+never touches the database. Creating the database and its tables is done once by `db_bootstrap`, except
+for an in-memory SQLite database, which no other process can reach: its tables are created along with
+the engine.
+"""
+_engines = {}
+_engines_lock = threading.Lock()
+
+def _async_url(url: str):
+    """
+    Returns the URL of the asynchronous driver of a database URL.
+    """
+    url = make_url(url)
+    return url.set(drivername=ASYNC_DRIVERS[url.get_backend_name()])
+
+def _is_memory_database():
+    """
+    Tells whether the primary database is an in-memory SQLite database.
+    """
+    return settings.database_backend == "sqlite" and settings.sqlite_path == ":memory:"
+
+def _create_memory_database(engine):
+    """
+    Creates the tables of the in-memory database. The database only lives as long as one of its 
+    connections, so a connection is kept open until the engines are disposed.
+
+    Returns:
+        sqlite3.Connection: The connection keeping the database alive.
+    """
+    from . import db_models
+    keep_alive = sqlite3.connect(SQLITE_MEMORY_URI, uri=True, check_same_thread=False)
+    db_models.Base.metadata.create_all(bind=engine)
+    return keep_alive
+
+def get_engine():
+    """
+    Returns the engine of the primary database, creating it on first use. All writes go through it.
+    """
+    with _engines_lock:
+        if 'sync' not in _engines:
+            engine = _configure_engine(create_engine(DATABASE_URL, **ENGINE_OPTIONS))
+            if _is_memory_database():
+                _engines['memory'] = _create_memory_database(engine)
+            _engines['sync'] = engine
+        return _engines['sync']
+
+def get_async_engine():
+    """
+    Returns the asynchronous engine of the primary database, creating it on first use.
+    """
+    if _is_memory_database():
+        get_engine()    # Creates the tables the asynchronous engine reads
+    with _engines_lock:
+        if 'async' not in _engines:
+            _engines['async'] = create_async_engine(_async_url(DATABASE_URL), **ENGINE_OPTIONS)
+            _configure_engine(_engines['async'].sync_engine)
+        return _engines['async']
+
+def get_async_read_engine(replica: int):
+    """
+    Returns the asynchronous engine of a read replica, creating it on first use.
+
+    Args:
+        replica (int): The index of the replica in `READ_URLS`.
+    """
+    with _engines_lock:
+        if ('async_read', replica) not in _engines:
+            engine = create_async_engine(_async_url(READ_URLS[replica]), **READ_ENGINE_OPTIONS)
+            _engines[('async_read', replica)] = engine
+            _configure_engine(engine.sync_engine)
+        return _engines[('async_read', replica)]
+
+async def dispose_engines():
+    """
+    Closes the pooled connections of the engines created so far, on application shutdown.
+    """
+    with _engines_lock:
+        engines = list(_engines.values())
+        _engines.clear()
+    for engine in engines:
+        if isinstance(engine, AsyncEngine):
+            await engine.dispose()
+        elif isinstance(engine, sqlite3.Connection):
+            engine.close()
+        else:
+            engine.dispose()
+
+class LazySession(Session):
+    """
+    Session binding to the engine only when it first needs a connection.
+    """
+    def get_bind(self, mapper=None, clause=None, **kwargs):
+        return get_engine()
+
+class LazyAsyncSession(Session):
+    """
+    Session run by `AsyncSession`, binding to the asynchronous engine only when it first needs a connection.
+    """
+    def get_bind(self, mapper=None, clause=None, **kwargs):
+        return get_async_engine().sync_engine
+
+class LazyAsyncReadSession(Session):
+    """
+    Session run by `AsyncSession` for read only requests, binding to the read replica stored in its
+    `info` under 'replica'.
+    """
+    def get_bind(self, mapper=None, clause=None, **kwargs):
+        return get_async_read_engine(self.info['replica']).sync_engine
+
+SessionLocal = sessionmaker(class_=LazySession, autocommit=False, autoflush=False)
+
+AsyncSessionLocal = async_sessionmaker(sync_session_class=LazyAsyncSession, autoflush=False, expire_on_commit=False)
+
+AsyncReadSessionLocal = async_sessionmaker(sync_session_class=LazyAsyncReadSession, autoflush=False, expire_on_commit=False)
 
 Base = declarative_base()
 
-def get_db():
+async def ping_database(replica: int = None):
+    """
+    Checks that the database, or one of its read replicas, answers a trivial query.
+    """
+    engine = get_async_engine() if replica is None else get_async_read_engine(replica)
+    async with engine.connect() as connection:
+        await connection.execute(text("SELECT 1"))
+
+database_breaker = CircuitBreaker(probe=ping_database)
+
+"""
+Every read replica has its own circuit breaker: a replica that is down is skipped, and its reads go to
+the other replicas, or to the primary once none is left.
+"""
+read_breakers = [
+    CircuitBreaker(probe=functools.partial(ping_database, replica), name=f"Read replica {replica}")
+    for replica in range(len(READ_URLS))
+]
+_next_replica = itertools.count()
+
+def choose_read_replica():
+    """
+    Picks the read replica serving the next read only request, in turn among the available ones.
+
+    Returns:
+        int: The index of the replica in `READ_URLS`.
+        None: If no replica is configured or available, the read goes to the primary.
+    """
+    start = next(_next_replica)
+    for offset in range(len(read_breakers)):
+        replica = (start + offset) % len(read_breakers)
+        if read_breakers[replica].allow():
+            return replica
+    return None
+
+def _database_unavailable():
+    """
+    Returns the 503 error failing a request fast while the database is down.
     """
-    Generator function that attempts to establish a database connection.
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail="Database unavailable",
+        headers={"Retry-After": str(max(1, round(database_breaker.retry_after())))}
+    )
+
+@asynccontextmanager
+async def primary_session():
+    """
+    Opens an asynchronous session on the primary database, checking a connection out first.
+
+    The connection is retried with `asyncio.sleep` backoff, so a database blip never freezes the worker,
+    and the circuit breaker fails requests fast while the database is down.
 
     Yields:
-        Session: A SQLAlchemy session object if the connection is successful.
+        AsyncSession: A SQLAlchemy asynchronous session, closed when the block exits.
 
     Raises:
-        Exception: If the maximum number of retries is reached without a successful connection.
-    """
-    retries = 0
-    while retries < MAX_RETRIES:
-        """Create a new session instance."""
-        db = SessionLocal()
-        try:
-            yield db    # Yield the database session back to the caller.
-            return      # Exit the loop and yield the db if successful
-        except SQLAlchemyError as e:
-            if db is not None:
-                db.rollback()   # Rollback the session to avoid any corrupted state.
-                db.close()      # Close the session to release the connection.
-            
-            logging.error(
-                f"SQLAlchemy error occurred: {str(e)}. "
-                "Retrying in {RETRY_INTERVAL} seconds..."
-            )
-            time.sleep(RETRY_INTERVAL)
-            retries += 1
-        finally:
-            db.close()
-    else:
-        logging.error(
-            "Max retries reached. Unable to establish database connection."
-        )
-        raise Exception(
-            "Max retries reached. Unable to establish database connection."
-        )
\ No newline at end of file
+        HTTPException: If the database is unavailable, a 503 Service Unavailable error is raised.
+    """
+    if not database_breaker.allow():
+        raise _database_unavailable()
+
+    async with AsyncSessionLocal() as db:
+        for attempt in range(MAX_RETRIES):
+            try:
+                await db.connection()
+                break
+            except SQLAlchemyError as e:
+                await db.rollback()
+                if attempt == MAX_RETRIES - 1:
+                    logging.error(f"Unable to establish database connection: {str(e)}")
+                    database_breaker.record_failure()
+                    raise _database_unavailable()
+                await asyncio.sleep(RETRY_INTERVAL * 2 ** attempt)
+
+        database_breaker.record_success()
+        yield db
+
+async def get_async_db():
+    """
+    Dependency of the request handlers, whose queries are awaited instead of blocking the event loop.
+    The session is bound to the primary database, so every request writing 
+    to the database depends on it.
+
+    Yields:
+        AsyncSession: A SQLAlchemy asynchronous session, closed once the request is handled.
+
+    Raises:
+        HTTPException: If the database is unavailable, a 503 Service Unavailable error is raised.
+    """
+    async with primary_session() as db:
+        yield db
+
+def is_read_replica(db: AsyncSession):
+    """
+    Tells whether a session reads from a replica, which may lag behind the primary.
+    """
+    return 'replica' in db.info
+
+async def get_async_read_db():
+    """
+    Dependency of the read only request handlers, serving their queries from a read replica so they 
+    do not compete with the ingestion for the primary.
+
+    The replicas are used in turn. A replica that cannot be reached is reported to its circuit breaker
+    and the request falls back to the primary, as it does when no replica is configured.
+
+    Yields:
+        AsyncSession: A SQLAlchemy asynchronous session, closed once the request is handled.
+
+    Raises:
+        HTTPException: If neither a replica nor the primary is available, a 503 Service Unavailable 
+            error is raised.
+    """
+    replica = choose_read_replica()
+    if replica is not None:
+        async with AsyncReadSessionLocal(info={'replica': replica}) as db:
+            try:
+                await db.connection()
+            except SQLAlchemyError as e:
+                await db.rollback()
+                logging.warning(f"Read replica {replica} unavailable, reading from the primary: {str(e)}")
+                read_breakers[replica].record_failure()
+            else:
+                read_breakers[replica].record_success()
+                yield db
+                return
+
+    async with primary_session() as db:
+        yield db
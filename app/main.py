@@ -1,21 +1,46 @@
 from fastapi import FastAPI
 from contextlib import asynccontextmanager
 from fastapi.middleware.cors import CORSMiddleware
-from .database import db_models
-from .database.db_setup import engine
-from .database.db_init_values import initialize_table_data
+import asyncio, logging, threading
+from .config import settings
 from .routers import *
+from .database.db_setup import dispose_engines
 
-db_models.Base.metadata.create_all(bind=engine)
+async def startup_scrape(url: str, limit: int, stop: threading.Event):
+    """
+    Scrapes the initial cars in a worker thread, so the application serves requests in the meantime.
+    Setting `stop` ends the scrape after the car being scraped, as the thread cannot be cancelled.
+
+    Returns:
+        bool: True if the scrape completed, False if it failed.
+    """
+    # The scraper stack is only imported when a scrape runs, to keep workers quick to boot
+    from .database.db_init_values import initialize_table_data
+
+    print(f"Initializing app: scrapping data from {url}")
+    try:
+        await asyncio.to_thread(initialize_table_data, url=url, limit=limit, stop=stop)
+        return True
+    except Exception as e:
+        logging.error(f"Startup scrape failed: {e}")
+        return False
 
 @asynccontextmanager
 async def app_lifespan(app: FastAPI):
     # code to execute when app is loading
-    url = "https://www.mudah.my/malaysia/cars-for-sale"
-    print(f"Initializing app: scrapping data from {url}")
-    initialize_table_data(url=url, limit=50)
+    app.state.startup_scrape = None
+    stop_scrape = threading.Event()
+    if settings.startup_scrape_limit > 0:
+        app.state.startup_scrape = asyncio.create_task(
+            startup_scrape(settings.startup_scrape_url, settings.startup_scrape_limit, stop_scrape)
+        )
     yield
     # code to execute when app is shutting down
+    if app.state.startup_scrape is not None:
+        # Let the scrape save what it has and release its connections before they are disposed
+        stop_scrape.set()
+        await app.state.startup_scrape
+    await dispose_engines()
     print("shutdown application")
 
 app = FastAPI(lifespan=app_lifespan)
@@ -32,6 +57,7 @@ app.add_middleware(
 
 app.include_router(car_router)
 app.include_router(api_router)
+app.include_router(health_router)
 
 @app.get("/")
 async def root():
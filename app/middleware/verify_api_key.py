@@ -1,21 +1,43 @@
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.exc import SQLAlchemyError
 from fastapi import status, HTTPException, Depends, Request
-import logging
+import logging, asyncio
 from ..database import db_models
-from ..database.db_setup import get_db
+from ..database.db_setup import get_async_read_db, is_read_replica, primary_session
 from ..utils.utils import verify
 
+async def _stored_api_keys(db: AsyncSession):
+    """
+    Returns the hashed API keys and their IDs stored in the database.
+    """
+    return (await db.execute(
+        select(
+            db_models.ApiKey.apiKey, 
+            db_models.ApiKey.apiKey_id
+        )
+    )).all()
+
+async def _matches(apiKey: str, user_api_key):
+    """
+    Tells whether a plain API key matches any of the hashed API keys.
+    """
+    for hashed_api_key, _ in user_api_key:
+        # Argon2 hashing is CPU bound, keep it off the event loop
+        if await asyncio.to_thread(verify, apiKey, hashed_api_key):
+            return True
+    return False
+
 async def verify_api_key(
         request: Request, 
-        db: Session = Depends(get_db)
+        db: AsyncSession = Depends(get_async_read_db)
     ):
     """
     Verify the validity of the provided API key for the company.
 
     Args:
         request (Request): The request object containing additional information.
-        db (Session): The database session.
+        db (AsyncSession): The read only database session, possibly on a read replica.
 
     Raises:
         HTTPException: If the API key is not found, a 403 Forbidden Error is raised.  
@@ -32,10 +54,16 @@ async def verify_api_key(
             )
 
         """Get all API keys and their IDs for the company from the database"""
-        user_api_key = db.query(
-            db_models.ApiKey.apiKey, 
-            db_models.ApiKey.apiKey_id
-        ).all()
+        user_api_key = await _stored_api_keys(db)
+
+        """Check if the provided API key matches any of the API keys in the database"""
+        valid_api = await _matches(apiKey, user_api_key)
+
+        """A read replica may not have caught up with a key that was just created, so check a miss on the primary"""
+        if not valid_api and is_read_replica(db):
+            async with primary_session() as primary_db:
+                user_api_key = await _stored_api_keys(primary_db)
+            valid_api = await _matches(apiKey, user_api_key)
 
         """If no API keys are found, raise a 403 Forbidden error"""
         if not user_api_key:
@@ -44,16 +72,6 @@ async def verify_api_key(
                 detail="No API key found, please create an API key"
             )
 
-        """Check if the provided API key matches any of the API keys in the database"""
-        for hashed_api_key, api_key_id in user_api_key:
-            verification = verify(apiKey, hashed_api_key)
-            if verification:
-                valid_api = True
-                api_key_id = api_key_id
-                break
-            else:
-                valid_api = False
-
         """If the API key is not valid, raise a 403 Forbidden error"""
         if not valid_api:
             raise HTTPException(
@@ -63,7 +81,7 @@ async def verify_api_key(
 
     except SQLAlchemyError as sqla_error:
         logging.error("SQLAlchemy error occurred: {}".format(str(sqla_error)))
-        db.rollback()  # Rollback the transaction in case of an SQLAlchemy error
+        await db.rollback()  # Rollback the transaction in case of an SQLAlchemy error
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Internal server error"
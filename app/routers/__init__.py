@@ -1,7 +1,9 @@
 from .api import router as api_router
 from .car import router as car_router
+from .health import router as health_router
 
 __all__ = [
     "api_router",
-    "car_router"
+    "car_router",
+    "health_router"
 ]
\ No newline at end of file
@@ -1,5 +1,4 @@
 from fastapi import APIRouter, Depends
-from typing import List
 from ..controller import *
 from .. import schemas
 from ..middleware.verify_api_key import verify_api_key
@@ -12,8 +11,9 @@ router = APIRouter(
 router.add_api_route(
     "/", 
     get_car_details, 
-    response_model=List[schemas.CarDetails], 
+    response_model=schemas.CarPage, 
     methods=["GET"],
+    response_model_exclude_unset=True,
     dependencies=[Depends(verify_api_key)]
 )
 
@@ -22,5 +22,6 @@ router.add_api_route(
     get_car_details_by_id, 
     response_model=schemas.CarDetails, 
     methods=["GET"],
+    response_model_exclude_unset=True,
     dependencies=[Depends(verify_api_key)]
 )
\ No newline at end of file
@@ -0,0 +1,19 @@
+from fastapi import APIRouter
+from ..controller import *
+
+router = APIRouter(
+    prefix="/health",
+    tags = ["HEALTH"]
+)
+
+router.add_api_route(
+    "/", 
+    get_health, 
+    methods=["GET"]
+)
+
+router.add_api_route(
+    "/ready", 
+    get_readiness, 
+    methods=["GET"]
+)
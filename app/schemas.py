@@ -1,4 +1,5 @@
 from pydantic import BaseModel
+from typing import List, Optional
 from datetime import datetime
 
 class General(BaseModel):
@@ -12,6 +13,10 @@ class General(BaseModel):
     seat_capacity: str
     country_of_origin: str
     price: str
+    price_value: Optional[int] = None
+    mileage_low: Optional[int] = None
+    mileage_high: Optional[int] = None
+    mfg_year_value: Optional[int] = None
 
 class Transmission(BaseModel):
     transmission: str
@@ -23,6 +28,9 @@ class Engine(BaseModel):
     peak_torque: str
     engine_type: str
     fuel_type: str
+    engine_cc_value: Optional[int] = None
+    peak_power_value: Optional[float] = None
+    peak_torque_value: Optional[float] = None
 
 class DimensionAndWeight(BaseModel):
     length: str
@@ -31,6 +39,12 @@ class DimensionAndWeight(BaseModel):
     wheel_base: str
     kerb_weight: str
     fuel_tank: str
+    length_value: Optional[int] = None
+    width_value: Optional[int] = None
+    height_value: Optional[int] = None
+    wheel_base_value: Optional[int] = None
+    kerb_weight_value: Optional[int] = None
+    fuel_tank_value: Optional[float] = None
 
 class Brakes(BaseModel):
     front_brakes: str
@@ -51,19 +65,24 @@ class TyresAndWheels(BaseModel):
 
 class CarDetails(BaseModel):
     id: str
-    general: General
-    transmission: Transmission
-    engine: Engine
-    dimension_and_weight: DimensionAndWeight
-    brakes: Brakes
-    suspension: Suspension
-    steering: Steering
-    tyres_and_wheels: TyresAndWheels
+    # Sections left out of a sparse response (see the `sections` query parameter) stay unset
+    general: Optional[General] = None
+    transmission: Optional[Transmission] = None
+    engine: Optional[Engine] = None
+    dimension_and_weight: Optional[DimensionAndWeight] = None
+    brakes: Optional[Brakes] = None
+    suspension: Optional[Suspension] = None
+    steering: Optional[Steering] = None
+    tyres_and_wheels: Optional[TyresAndWheels] = None
     created_at: datetime
 
     class Config:
         orm_mode = True
 
+class CarPage(BaseModel):
+    items: List[CarDetails]
+    next_cursor: Optional[str] = None
+
 class ApiKeyOut(BaseModel):
     id: str                     
     apiKey: str                 
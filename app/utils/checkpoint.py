@@ -0,0 +1,119 @@
+import threading
+import logging
+import json
+import os
+
+class CrawlCheckpoint:
+    def __init__(self, path: str = ".cache/crawl_checkpoint.json"):
+        """
+        Crawl frontier persisted to local storage so an interrupted crawl can be resumed.
+
+        For every pagination chain (keyed by the URL the chain starts from) the checkpoint keeps the
+        listing page being processed and the detail links of that page still to be scraped. It also
+        remembers the ids of every ad scraped so far, which the incremental mode uses to recognise
+        listings it already has.
+
+        The state is only written to disk by `save`, which the consumer of the crawl should call once
+        the cars it received are durably stored.
+
+        Args:
+            path (str): The JSON file holding the checkpoint.
+        """
+        self.path = path
+        self._lock = threading.Lock()
+        self.pages = {}
+        self.seen = {}
+        self.load()
+
+    def load(self):
+        """
+        Loads the checkpoint from disk, starting from an empty state if there is none.
+        """
+        try:
+            with open(self.path, 'r') as checkpoint_file:
+                state = json.load(checkpoint_file)
+            self.pages = state.get('pages', {})
+            self.seen = state.get('seen', {})
+
+        except FileNotFoundError:
+            self.pages = {}
+            self.seen = {}
+
+        except ValueError as e:
+            logging.error(f"Ignoring corrupted crawl checkpoint {self.path}: {e}")
+            self.pages = {}
+            self.seen = {}
+
+    def save(self):
+        """
+        Atomically writes the checkpoint to disk.
+        """
+        with self._lock:
+            state = {'pages': self.pages, 'seen': self.seen}
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            temp_path = f"{self.path}.tmp"
+            with open(temp_path, 'w') as checkpoint_file:
+                json.dump(state, checkpoint_file)
+            os.replace(temp_path, self.path)
+
+    def frontier(self, start_url: str):
+        """
+        Returns where the pagination chain starting at `start_url` should resume.
+
+        Returns:
+            tuple: The listing page URL and the detail links still pending on it (None to take every
+                link of the page).
+        """
+        with self._lock:
+            page = self.pages.get(start_url)
+            if page is None:
+                return start_url, None
+            return page['url'], list(page['pending'])
+
+    def set_frontier(self, start_url: str, page_url: str, pending_links: list):
+        """
+        Records the listing page being processed and the detail links still to be scraped on it.
+        """
+        with self._lock:
+            self.pages[start_url] = {'url': page_url, 'pending': list(pending_links)}
+
+    def link_done(self, start_url: str, link: str):
+        """
+        Removes a detail link from the pending links of its pagination chain.
+        """
+        with self._lock:
+            page = self.pages.get(start_url)
+            if page is not None and link in page['pending']:
+                page['pending'].remove(link)
+
+    def finish(self, start_url: str):
+        """
+        Forgets the frontier of a completed pagination chain so the next crawl starts from the beginning.
+        """
+        with self._lock:
+            self.pages.pop(start_url, None)
+
+    def mark_seen(self, ad_id: str, fingerprint: str = None):
+        """
+        Remembers that an ad has been scraped.
+        """
+        if ad_id is None:
+            return
+        with self._lock:
+            self.seen[ad_id] = fingerprint
+
+    def fingerprint(self, ad_id: str):
+        """
+        Returns the listing summary fingerprint recorded when an ad was scraped, if any.
+        """
+        with self._lock:
+            return self.seen.get(ad_id)
+
+    def is_seen(self, ad_id: str):
+        """
+        Checks whether an ad has been scraped by this or a previous crawl.
+        """
+        with self._lock:
+            return ad_id in self.seen
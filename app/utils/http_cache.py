@@ -0,0 +1,148 @@
+from collections import namedtuple
+import threading
+import sqlite3
+import logging
+import time
+import os
+
+CacheEntry = namedtuple("CacheEntry", ["url", "body", "etag", "last_modified", "fetched_at"])
+
+class HttpCache:
+    def __init__(
+            self,
+            path: str = ".cache/http_cache.sqlite3",
+            max_bytes: int = 512 * 1024 * 1024,
+            max_age: float = 3600
+        ):
+        """
+        Persistent on-disk cache of scraped pages, keyed by URL.
+
+        Each entry keeps the response body together with its ETag, Last-Modified and fetch time.
+        Entries younger than `max_age` are served without touching the network; older ones are
+        revalidated with a conditional request. When the stored bodies exceed `max_bytes`, the
+        least recently used entries are evicted.
+
+        Args:
+            path (str): The SQLite file holding the cache.
+            max_bytes (int): The maximum total size of the cached bodies.
+            max_age (float): The number of seconds an entry is served without revalidation.
+        """
+        self.path = path
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS http_cache (
+                url TEXT PRIMARY KEY,
+                body BLOB NOT NULL,
+                etag TEXT,
+                last_modified TEXT,
+                fetched_at REAL NOT NULL,
+                accessed_at REAL NOT NULL,
+                size INTEGER NOT NULL
+            )
+            """
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS ix_http_cache_accessed_at ON http_cache (accessed_at)")
+        self._total_bytes = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM http_cache").fetchone()[0]
+
+    def get(self, url: str):
+        """
+        Looks up the cached response of a URL.
+
+        Returns:
+            CacheEntry: The cached response.
+            None: If the URL is not cached.
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT url, body, etag, last_modified, fetched_at FROM http_cache WHERE url = ?",
+                (url,)
+            ).fetchone()
+            if row is None:
+                return None
+            self._conn.execute("UPDATE http_cache SET accessed_at = ? WHERE url = ?", (time.time(), url))
+            return CacheEntry(*row)
+
+    def is_fresh(self, entry: CacheEntry):
+        """
+        Checks whether an entry is young enough to be served without revalidation.
+        """
+        return time.time() - entry.fetched_at < self.max_age
+
+    def conditional_headers(self, entry: CacheEntry):
+        """
+        Builds the headers turning a GET for a cached URL into a conditional request.
+
+        Returns:
+            dict: The If-None-Match and/or If-Modified-Since headers.
+        """
+        headers = {}
+        if entry is None:
+            return headers
+        if entry.etag:
+            headers["If-None-Match"] = entry.etag
+        if entry.last_modified:
+            headers["If-Modified-Since"] = entry.last_modified
+        return headers
+
+    def store(self, url: str, body: bytes, etag: str = None, last_modified: str = None):
+        """
+        Stores a freshly downloaded response, evicting old entries if the cache grows too large.
+        """
+        now = time.time()
+        with self._lock:
+            previous = self._conn.execute("SELECT size FROM http_cache WHERE url = ?", (url,)).fetchone()
+            self._conn.execute(
+                """
+                INSERT OR REPLACE INTO http_cache (url, body, etag, last_modified, fetched_at, accessed_at, size)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+                """,
+                (url, body, etag, last_modified, now, now, len(body))
+            )
+            self._total_bytes += len(body) - (previous[0] if previous else 0)
+            self._evict()
+
+    def revalidated(self, url: str):
+        """
+        Marks a cached entry as fresh again after the server answered 304 Not Modified.
+        """
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "UPDATE http_cache SET fetched_at = ?, accessed_at = ? WHERE url = ?",
+                (now, now, url)
+            )
+
+    def _evict(self):
+        """
+        Removes the least recently used entries until the cache fits in `max_bytes`.
+        Must be called with the lock held.
+        """
+        while self._total_bytes > self.max_bytes:
+            rows = self._conn.execute(
+                "SELECT url, size FROM http_cache ORDER BY accessed_at LIMIT 100"
+            ).fetchall()
+            if not rows:
+                self._total_bytes = 0
+                return
+            for url, size in rows:
+                self._conn.execute("DELETE FROM http_cache WHERE url = ?", (url,))
+                self._total_bytes -= size
+                if self._total_bytes <= self.max_bytes:
+                    break
+            logging.info(f"Evicted cached pages, cache size is now {self._total_bytes} bytes")
+
+    def close(self):
+        """
+        Closes the underlying database connection.
+        """
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,216 @@
+from bs4 import BeautifulSoup
+import hashlib
+import logging
+import json
+import re
+
+# Matches the opening tag of the Next.js data script regardless of attribute order and quoting
+NEXT_DATA_TAG = re.compile(rb'<script[^>]*\bid\s*=\s*["\']?__NEXT_DATA__["\']?[^>]*>', re.IGNORECASE)
+SCRIPT_END_TAG = re.compile(rb'</script\s*>', re.IGNORECASE)
+
+def _extract_next_data_fast(html_text: bytes):
+    """
+    Locates the `__NEXT_DATA__` script in the raw response bytes and decodes its JSON content
+    without building a DOM.
+
+    Args:
+        html_text (bytes): The raw HTML content of the webpage.
+
+    Returns:
+        dict: The decoded JSON payload.
+        None: If the script tag cannot be located or its content is not valid JSON.
+    """
+    start_tag = NEXT_DATA_TAG.search(html_text)
+    if start_tag is None:
+        return None
+    end_tag = SCRIPT_END_TAG.search(html_text, start_tag.end())
+    if end_tag is None:
+        return None
+    try:
+        return json.loads(html_text[start_tag.end():end_tag.start()])
+    except ValueError:
+        return None
+
+def extract_next_data(html_text: bytes, parser: str = "html5lib"):
+    """
+    Extracts the JSON payload embedded by Next.js in the `<script id="__NEXT_DATA__">` tag.
+
+    The payload is first sliced straight out of the response bytes. Only when that fails is the page
+    parsed with BeautifulSoup to look the tag up in the tree.
+
+    Args:
+        html_text (bytes): The raw HTML content of the webpage.
+        parser (str): The BeautifulSoup parser backend used by the fallback path.
+
+    Returns:
+        dict: The decoded JSON payload.
+        None: If the page has no valid `__NEXT_DATA__` payload.
+    """
+    if not html_text:
+        return None
+    if isinstance(html_text, str):
+        html_text = html_text.encode('utf-8')
+
+    json_data = _extract_next_data_fast(html_text)
+    if json_data is not None:
+        return json_data
+
+    try:
+        logging.info("Fast __NEXT_DATA__ extraction failed, falling back to the tree parser")
+        soup = BeautifulSoup(html_text, parser)
+        json_script_tag = soup.find('script', attrs={'id': '__NEXT_DATA__'})
+        if json_script_tag is None or not json_script_tag.string:
+            return None
+        return json.loads(json_script_tag.string)
+
+    except Exception as e:
+        error_message = f"Error occurred during __NEXT_DATA__ extraction: {str(e)}"
+        logging.error(msg=error_message)
+        return None
+
+# Candidate keys of each summary field in the ad objects of the listing payload
+SUMMARY_FIELDS = {
+    'price': ('price',),
+    'brand': ('make', 'brand', 'carBrand'),
+    'model': ('model', 'carModel'),
+    'mileage': ('mileage',),
+    'year': ('year', 'mfgYear', 'manufacturedYear', 'manufacturedDate'),
+}
+# Mudah ad URLs end with the ad id, e.g. "...-104588287.htm"
+AD_ID_PATTERN = re.compile(r'-(\d+)\.htm')
+
+def _summary_value(ad: dict, keys: tuple):
+    """
+    Returns the first of the candidate keys present in an ad object or in its 'attributes'.
+    """
+    for source in (ad, ad.get('attributes') if isinstance(ad.get('attributes'), dict) else {}):
+        for key in keys:
+            if source.get(key) not in (None, ''):
+                return source[key]
+    return None
+
+def _iter_ads(node):
+    """
+    Walks a listing payload and yields every object that links to a car details page.
+    """
+    if isinstance(node, dict):
+        if any(isinstance(value, str) and AD_ID_PATTERN.search(value) for value in node.values()):
+            yield node
+            return
+        for value in node.values():
+            yield from _iter_ads(value)
+    elif isinstance(node, list):
+        for value in node:
+            yield from _iter_ads(value)
+
+def summary_fingerprint(summary: dict):
+    """
+    Hashes the summary fields of an ad, so a change of price, mileage etc. can be detected cheaply.
+    """
+    fields = {field: summary.get(field) for field in SUMMARY_FIELDS}
+    return hashlib.sha1(json.dumps(fields, sort_keys=True, default=str).encode('utf-8')).hexdigest()
+
+def _is_trusted_summary(summary: dict):
+    """
+    Tells whether enough summary fields were found to fingerprint an ad: its price and at least one
+    other field. Otherwise the keys were not recognised, and every such ad would share a fingerprint.
+    """
+    return summary.get('price') is not None and any(
+        summary.get(field) is not None for field in SUMMARY_FIELDS if field != 'price'
+    )
+
+def extract_listing_summaries(json_data: dict):
+    """
+    Extracts the ad summaries carried by the `__NEXT_DATA__` payload of a listing page.
+
+    The shape of the payload is not relied upon: every object holding a link to a car details page
+    is taken as an ad, and its price, brand, model, mileage and year are read from the usual keys.
+    Ads whose summary lacks the price or every other field are left out, so they are treated as changed.
+
+    Args:
+        json_data (dict): The decoded `__NEXT_DATA__` payload of a listing page.
+
+    Returns:
+        dict: The summaries keyed by ad id, each with the ad 'url', the summary fields and a 'fingerprint'.
+    """
+    summaries = {}
+    unrecognised = set()
+    if not json_data:
+        return summaries
+
+    for ad in _iter_ads(json_data):
+        url = next(
+            value for value in ad.values() 
+            if isinstance(value, str) and AD_ID_PATTERN.search(value)
+        )
+        ad_id = AD_ID_PATTERN.search(url).group(1)
+        if ad_id in summaries:
+            continue
+        summary = {field: _summary_value(ad, keys) for field, keys in SUMMARY_FIELDS.items()}
+        if not _is_trusted_summary(summary):
+            unrecognised.add(ad_id)
+            continue
+        summary['url'] = url
+        summary['fingerprint'] = summary_fingerprint(summary)
+        summaries[ad_id] = summary
+
+    unrecognised -= summaries.keys()
+    if unrecognised:
+        logging.warning(
+            f"Listing payload shape not recognised for {len(unrecognised)} ad(s), fetching their details pages"
+        )
+    return summaries
+
+def flatten_car_details(json_data: dict):
+    """
+    Flattens the car specifications of a detail page `__NEXT_DATA__` payload into a dictionary
+    of categories, each mapping a specification label to its value.
+
+    Args:
+        json_data (dict): The decoded `__NEXT_DATA__` payload of a car details page.
+
+    Returns:
+        dict: A dictionary with car specifications, e.g. {'GENERAL': {'Brand': 'Toyota', ...}, ...}.
+    """
+    car_specifications = {}
+    result = {}
+    for ad_id, item in json_data.get('props', {}).get('initialState', {}).get('adDetails', {}).get('byID').items():
+        # The ads are keyed by their Mudah ad id, which identifies the listing
+        car_specifications['LISTING'] = [{'label':'Ad ID', 'value':str(ad_id)}]
+        # Parsing each car specification from the JSON data
+        car_specifications['PRICE'] = [{'label':'Price', 'value':item.get('attributes', {}).get('price')}]
+        for car_spec in (item.get('attributes', {}).get('mcdParams', [])):
+            car_specifications[car_spec.get('header', '')] = car_spec.get('params', [])
+
+    for category in car_specifications:
+        result[category] = {}
+        for item in car_specifications[category]:
+            label = item['label']
+            value = item['value']
+            result[category][label] = value
+
+    return result
+
+def parse_car_page(html_text: bytes, parser: str = "html5lib"):
+    """
+    Extracts and flattens the car specifications of a car details page. Being a module level function 
+    working on plain bytes, it can be shipped to worker processes.
+
+    Args:
+        html_text (bytes): The raw HTML content of a car details page.
+        parser (str): The BeautifulSoup parser backend used if the fast extraction fails.
+
+    Returns:
+        dict: A dictionary with car specifications.
+        None: If the page carries no car specifications.
+    """
+    try:
+        json_data = extract_next_data(html_text, parser=parser)
+        if json_data is None:
+            raise ValueError("No __NEXT_DATA__ payload found")
+        return flatten_car_details(json_data)
+
+    except Exception as e:
+        error_message = f"Error occurred during car details extraction: {str(e)}"
+        logging.error(msg=error_message)
+        return None
@@ -0,0 +1,44 @@
+import base64
+import binascii
+import json
+
+"""
+Opaque cursors of the keyset paginated endpoints. A cursor holds the sort key of the last item of a
+page, so the next page starts right after it with an indexed range scan instead of an OFFSET that
+reads and discards every previous row. Clients must treat cursors as opaque strings.
+"""
+
+def encode_cursor(position: dict):
+    """
+    Encodes the position of the last item of a page into a cursor.
+
+    Args:
+        position (dict): The sort key values of the last item, e.g. {'id': 42}.
+
+    Returns:
+        str: The URL safe cursor.
+    """
+    payload = json.dumps(position, separators=(',', ':'), sort_keys=True).encode()
+    return base64.urlsafe_b64encode(payload).decode().rstrip('=')
+
+def decode_cursor(cursor: str):
+    """
+    Decodes a cursor made by `encode_cursor`.
+
+    Args:
+        cursor (str): The cursor sent by the client.
+
+    Returns:
+        dict: The position of the last item of the previous page.
+
+    Raises:
+        ValueError: If the cursor is malformed.
+    """
+    try:
+        payload = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        position = json.loads(payload)
+    except (binascii.Error, UnicodeDecodeError, ValueError) as e:
+        raise ValueError(f"Invalid cursor: {cursor}") from e
+    if not isinstance(position, dict):
+        raise ValueError(f"Invalid cursor: {cursor}")
+    return position
@@ -0,0 +1,212 @@
+from concurrent.futures import ProcessPoolExecutor
+import multiprocessing
+from collections import deque
+from typing import Callable, List, Optional
+import threading
+import logging
+import queue
+from .web_scraper import WebScraper
+from .next_data import parse_car_page
+
+# Marks the end of the stream on every queue of the pipeline
+_DONE = object()
+
+class CrawlPipeline:
+    def __init__(
+            self,
+            scraper: WebScraper,
+            persist: Callable[[List[dict]], None],
+            fetch_workers: int = 4,
+            parse_workers: Optional[int] = None,
+            batch_size: int = 50,
+            queue_size: int = 100
+        ):
+        """
+        Staged crawl pipeline: fetch -> parse -> persist.
+
+        A discovery thread walks the listing pages and feeds detail links to a pool of fetcher threads.
+        The raw bytes they download are parsed by a process pool, and the resulting car dictionaries are
+        handed to `persist` in batches on the calling thread. The parser processes are spawned rather than
+        forked, as a child forked while the fetcher threads hold locks could deadlock. Every stage is connected by a bounded queue,
+        so a slow stage applies backpressure to the ones feeding it.
+
+        Args:
+            scraper (WebScraper): The scraper providing the listing walk and the rate limited fetch.
+            persist (Callable): Called with each batch of car dictionaries, e.g. to write them to the database.
+            fetch_workers (int): The number of I/O bound fetcher threads.
+            parse_workers (int): The number of parser processes, defaults to the number of CPUs.
+            batch_size (int): The number of cars handed to `persist` at once.
+            queue_size (int): The capacity of each queue between stages.
+
+        Raises:
+            ValueError: If the scraper is in listing data mode, whose fingerprints are recorded by the 
+                checkpoint the pipeline does not keep.
+        """
+        if scraper.use_listing_data:
+            raise ValueError("The crawl pipeline does not support the listing data mode")
+        self.scraper = scraper
+        self.persist = persist
+        self.fetch_workers = fetch_workers
+        self.parse_workers = parse_workers
+        self.batch_size = batch_size
+        self.queue_size = queue_size
+
+    def _put(self, target: queue.Queue, item, stop: threading.Event):
+        """
+        Puts an item on a bounded queue, giving up once the pipeline is stopping.
+
+        Returns:
+            bool: True if the item was queued, False if the pipeline stopped first.
+        """
+        while not stop.is_set():
+            try:
+                target.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _get(self, source: queue.Queue, stop: threading.Event):
+        """
+        Takes the next item from a queue, returning the end marker once the pipeline is stopping, even if
+        items are left, so no more pages are fetched or parsed.
+        """
+        while not stop.is_set():
+            try:
+                return source.get(timeout=0.1)
+            except queue.Empty:
+                continue
+        return _DONE
+
+    def _discover(self, link_queue: queue.Queue, stop: threading.Event):
+        """
+        Walks the listing pages of every shard and queues each car detail link found once. In incremental
+        mode, the links of already stored ads are dropped and a shard stops paginating once the scraper's
+        `stop_after_known` consecutive ones are seen.
+        """
+        try:
+            claimed = set()
+            for start_url in self.scraper._chain_urls():
+                current_url = start_url
+                known_streak = 0
+                while current_url is not None and not stop.is_set():
+                    print(f"Scrapping from {current_url}")
+                    soup = self.scraper._parse_html(self.scraper._get_html(current_url))
+                    car_links, known_streak, caught_up = self.scraper._select_links(
+                        self.scraper._get_car_link(soup), known_streak
+                    )
+                    for link in car_links:
+                        if not self.scraper._claim(link, claimed):
+                            continue
+                        if not self._put(link_queue, link, stop):
+                            break
+                    current_url = None if caught_up else self.scraper._next_page(soup)
+
+        except Exception as e:
+            logging.error(f"Error occurred during listing discovery: {e}", exc_info=True)
+        finally:
+            for _ in range(self.fetch_workers):
+                self._put(link_queue, _DONE, stop)
+
+    def _fetch(self, link_queue: queue.Queue, raw_queue: queue.Queue, stop: threading.Event):
+        """
+        Downloads the detail pages of the queued links.
+        """
+        try:
+            while True:
+                link = self._get(link_queue, stop)
+                if link is _DONE:
+                    break
+                print(f"Scrapping from {link}")
+                html_text = self.scraper._get_html(link)
+                if html_text is not None:
+                    self._put(raw_queue, html_text, stop)
+
+        except Exception as e:
+            logging.error(f"Error occurred while fetching car details: {e}", exc_info=True)
+        finally:
+            self._put(raw_queue, _DONE, stop)
+
+    def _parse(self, raw_queue: queue.Queue, car_queue: queue.Queue, stop: threading.Event):
+        """
+        Dispatches the downloaded pages to the process pool, keeping a bounded number of pages in flight.
+        """
+        pending = deque()
+        max_pending = self.queue_size
+        finished_fetchers = 0
+        try:
+            with ProcessPoolExecutor(
+                max_workers=self.parse_workers, 
+                mp_context=multiprocessing.get_context("spawn")
+            ) as executor:
+                while finished_fetchers < self.fetch_workers:
+                    html_text = self._get(raw_queue, stop)
+                    if html_text is _DONE:
+                        finished_fetchers += 1
+                        continue
+                    pending.append(executor.submit(parse_car_page, html_text, self.scraper.parser))
+                    while pending and (len(pending) >= max_pending or pending[0].done()):
+                        self._put(car_queue, pending.popleft().result(), stop)
+
+                while pending:
+                    self._put(car_queue, pending.popleft().result(), stop)
+
+        except Exception as e:
+            logging.error(f"Error occurred while parsing car details: {e}", exc_info=True)
+            stop.set()
+        finally:
+            self._put(car_queue, _DONE, stop)
+
+    def run(self, limit: int = 50, stop: threading.Event = None):
+        """
+        Runs the pipeline until `limit` cars have been persisted or the listing is exhausted.
+
+        Args:
+            limit (int): The maximum number of cars to persist.
+            stop (threading.Event): Optional event stopping every stage early when set, e.g. on application
+                shutdown. The pipeline sets it once it is done.
+
+        Returns:
+            int: The number of cars handed to `persist`.
+        """
+        stop = stop if stop is not None else threading.Event()
+        link_queue = queue.Queue(maxsize=self.queue_size)
+        raw_queue = queue.Queue(maxsize=self.queue_size)
+        car_queue = queue.Queue(maxsize=self.queue_size)
+
+        threads = [threading.Thread(target=self._discover, args=(link_queue, stop), daemon=True)]
+        threads += [
+            threading.Thread(target=self._fetch, args=(link_queue, raw_queue, stop), daemon=True)
+            for _ in range(self.fetch_workers)
+        ]
+        threads.append(threading.Thread(target=self._parse, args=(raw_queue, car_queue, stop), daemon=True))
+        for thread in threads:
+            thread.start()
+
+        persisted = 0
+        batch = []
+        try:
+            while True:
+                car_detail = self._get(car_queue, stop)
+                if car_detail is _DONE:
+                    break
+                if car_detail is None:
+                    continue
+                batch.append(car_detail)
+                if len(batch) >= min(self.batch_size, limit - persisted):
+                    self.persist(batch)
+                    persisted += len(batch)
+                    batch = []
+                if persisted >= limit:
+                    break
+            if batch:
+                self.persist(batch)
+                persisted += len(batch)
+
+        finally:
+            # Every stage polls the stop flag, so they all wind down once it is set
+            stop.set()
+            for thread in threads:
+                thread.join()
+
+        return persisted
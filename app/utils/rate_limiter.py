@@ -0,0 +1,254 @@
+from contextlib import contextmanager
+from email.utils import parsedate_to_datetime
+import datetime
+import threading
+import asyncio
+import logging
+import json
+import time
+import os
+
+try:
+    import fcntl
+except ImportError:
+    # No flock on Windows, limiters there only share their budget within the process
+    fcntl = None
+
+class AdaptiveRateLimiter:
+    def __init__(
+            self,
+            rate: float = 1.0,
+            min_rate: float = 0.1,
+            max_rate: float = 10.0,
+            burst: int = 5,
+            increase: float = 0.1,
+            decrease: float = 0.5,
+            latency_threshold: float = 5.0,
+            state_path: str = None
+        ):
+        """
+        Token bucket rate limiter whose rate adapts to how the site responds.
+
+        Every successful, fast response increases the rate additively by `increase` requests per second,
+        while a 429/503 or a response slower than `latency_threshold` multiplies it by `decrease` (AIMD).
+        A Retry-After header blocks every caller until the time the server asked for.
+
+        The limiter is safe to share between threads and asyncio tasks. When `state_path` is given, the
+        bucket lives in that file under an exclusive lock, so every process of the host using the same
+        path shares one budget. Where file locks are unavailable (Windows), `state_path` is ignored and
+        the bucket stays in the process. The async methods then wait for the lock and do the file I/O in a 
+        worker thread, keeping the event loop free.
+
+        Args:
+            rate (float): The initial number of requests per second.
+            min_rate (float): The lowest rate the limiter backs off to.
+            max_rate (float): The highest rate the limiter ramps up to.
+            burst (int): The capacity of the bucket, i.e. how many requests may be sent back to back.
+            increase (float): The rate added after each successful response.
+            decrease (float): The factor applied to the rate when the site pushes back.
+            latency_threshold (float): Responses slower than this many seconds count as push back.
+            state_path (str): Optional file holding the bucket shared between processes.
+        """
+        self.initial_rate = rate
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.burst = burst
+        self.increase = increase
+        self.decrease = decrease
+        self.latency_threshold = latency_threshold
+        if state_path is not None and fcntl is None:
+            logging.warning(f"File locks are unavailable, the rate limiter budget is not shared through {state_path}")
+            state_path = None
+        self.state_path = state_path
+        self._lock = threading.Lock()
+        self._state = self._initial_state()
+
+        self.acquired = 0
+        self.throttled = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    def _initial_state(self):
+        """
+        Returns a full bucket running at the initial rate.
+        """
+        return {
+            'rate': self.initial_rate,
+            'tokens': float(self.burst),
+            'updated_at': time.time(),
+            'blocked_until': 0.0
+        }
+
+    @contextmanager
+    def _locked_state(self):
+        """
+        Yields the bucket state for modification, holding the thread lock and, for a shared
+        limiter, an exclusive lock on the state file.
+        """
+        with self._lock:
+            if self.state_path is None:
+                yield self._state
+                return
+
+            directory = os.path.dirname(self.state_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with open(self.state_path, 'a+') as state_file:
+                fcntl.flock(state_file, fcntl.LOCK_EX)
+                try:
+                    state_file.seek(0)
+                    content = state_file.read()
+                    try:
+                        state = json.loads(content) if content else self._initial_state()
+                    except ValueError:
+                        state = self._initial_state()
+                    yield state
+                    state_file.seek(0)
+                    state_file.truncate()
+                    state_file.write(json.dumps(state))
+                    state_file.flush()
+                finally:
+                    fcntl.flock(state_file, fcntl.LOCK_UN)
+
+    def _reserve(self):
+        """
+        Claims the next token of the bucket.
+
+        Tokens may go negative: each caller is handed the time at which its token becomes available,
+        so concurrent callers are scheduled one after another at the current rate.
+
+        Returns:
+            float: The number of seconds the caller must wait before sending its request.
+        """
+        with self._locked_state() as state:
+            now = time.time()
+            elapsed = max(0.0, now - state['updated_at'])
+            state['tokens'] = min(float(self.burst), state['tokens'] + elapsed * state['rate'])
+            state['updated_at'] = now
+            state['tokens'] -= 1
+            wait = max(0.0, -state['tokens'] / state['rate'])
+            wait = max(wait, state['blocked_until'] - now)
+            self.acquired += 1
+            self.total_wait += wait
+            self.max_wait = max(self.max_wait, wait)
+
+        return wait
+
+    def acquire(self):
+        """
+        Blocks the calling thread until it may send a request.
+        """
+        wait = self._reserve()
+        if wait > 0:
+            time.sleep(wait)
+
+    async def _off_loop(self, function, *args, **kwargs):
+        """
+        Runs a method taking the state lock, in a worker thread when the state lives in a file.
+        """
+        if self.state_path is None:
+            return function(*args, **kwargs)
+        return await asyncio.to_thread(function, *args, **kwargs)
+
+    async def aacquire(self):
+        """
+        Suspends the calling task until it may send a request, without blocking the event loop.
+        """
+        wait = await self._off_loop(self._reserve)
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+    def record(self, status_code: int = None, latency: float = None, retry_after: str = None):
+        """
+        Adapts the rate to the outcome of a request.
+
+        Args:
+            status_code (int): The status code of the response, None if the request failed.
+            latency (float): The number of seconds the request took.
+            retry_after (str): The Retry-After header of the response, if any.
+        """
+        pushed_back = status_code in (429, 503) or (
+            latency is not None and latency > self.latency_threshold
+        )
+        delay = parse_retry_after(retry_after)
+        with self._locked_state() as state:
+            if pushed_back:
+                state['rate'] = max(self.min_rate, state['rate'] * self.decrease)
+            elif status_code is not None and status_code < 400:
+                state['rate'] = min(self.max_rate, state['rate'] + self.increase)
+            if delay is not None:
+                state['blocked_until'] = max(state['blocked_until'], time.time() + delay)
+            rate = state['rate']
+            if pushed_back:
+                self.throttled += 1
+
+        if pushed_back:
+            logging.info(f"Site pushed back (status {status_code}), rate lowered to {rate:.2f} req/s")
+
+    async def arecord(self, status_code: int = None, latency: float = None, retry_after: str = None):
+        """
+        Asynchronous counterpart of `record`, without blocking the event loop.
+        """
+        await self._off_loop(self.record, status_code=status_code, latency=latency, retry_after=retry_after)
+
+    def metrics(self):
+        """
+        Returns the current rate and the wait times observed by this process.
+
+        Returns:
+            dict: The current rate, the number of requests let through and throttled, and the
+                total, average and maximum wait times in seconds.
+        """
+        with self._locked_state() as state:
+            rate = state['rate']
+            blocked_for = max(0.0, state['blocked_until'] - time.time())
+        return {
+            'rate': rate,
+            'blocked_for': blocked_for,
+            'acquired': self.acquired,
+            'throttled': self.throttled,
+            'total_wait': self.total_wait,
+            'average_wait': self.total_wait / self.acquired if self.acquired else 0.0,
+            'max_wait': self.max_wait
+        }
+
+    async def ametrics(self):
+        """
+        Asynchronous counterpart of `metrics`, without blocking the event loop.
+        """
+        return await self._off_loop(self.metrics)
+
+def parse_retry_after(retry_after: str):
+    """
+    Parses a Retry-After header, given either as a number of seconds or as an HTTP date.
+
+    Returns:
+        float: The number of seconds to wait.
+        None: If the header is missing or invalid.
+    """
+    if not retry_after:
+        return None
+    try:
+        return max(0.0, float(retry_after))
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(retry_after)
+        if retry_at.tzinfo is None:
+            retry_at = retry_at.replace(tzinfo=datetime.timezone.utc)
+        return max(0.0, (retry_at - datetime.datetime.now(datetime.timezone.utc)).total_seconds())
+    except (TypeError, ValueError):
+        return None
+
+_default_rate_limiter = None
+_default_rate_limiter_lock = threading.Lock()
+
+def default_rate_limiter():
+    """
+    Returns the rate limiter shared by every scraper of the process that was not given its own.
+    """
+    global _default_rate_limiter
+    with _default_rate_limiter_lock:
+        if _default_rate_limiter is None:
+            _default_rate_limiter = AdaptiveRateLimiter()
+        return _default_rate_limiter
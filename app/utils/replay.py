@@ -0,0 +1,182 @@
+from requests.adapters import BaseAdapter, HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+import threading
+import hashlib
+import requests
+import logging
+import httpx
+import json
+import os
+
+# Headers describing the transfer rather than the page, the corpus stores decoded bodies
+SKIPPED_HEADERS = {'content-encoding', 'content-length', 'transfer-encoding', 'connection', 'keep-alive'}
+
+class Corpus:
+    def __init__(self, directory: str):
+        """
+        Directory of recorded pages that can be replayed instead of hitting the website.
+
+        Every page body is stored in its own file named after the hash of its URL, and `index.json`
+        maps each URL to its file, status code and headers.
+
+        Args:
+            directory (str): The directory holding the corpus.
+        """
+        self.directory = directory
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+        self._index_path = os.path.join(directory, 'index.json')
+        try:
+            with open(self._index_path, 'r') as index_file:
+                self.index = json.load(index_file)
+        except FileNotFoundError:
+            self.index = {}
+
+    def save(self, url: str, status_code: int, headers: dict, body: bytes):
+        """
+        Records a fetched page.
+        """
+        file_name = f"{hashlib.sha1(url.encode('utf-8')).hexdigest()}.html"
+        with open(os.path.join(self.directory, file_name), 'wb') as body_file:
+            body_file.write(body)
+        with self._lock:
+            self.index[url] = {
+                'file': file_name,
+                'status_code': status_code,
+                'headers': {
+                    key: value for key, value in headers.items()
+                    if key.lower() not in SKIPPED_HEADERS
+                }
+            }
+            temp_path = f"{self._index_path}.tmp"
+            with open(temp_path, 'w') as index_file:
+                json.dump(self.index, index_file)
+            os.replace(temp_path, self._index_path)
+
+    def load(self, url: str):
+        """
+        Looks a recorded page up.
+
+        Returns:
+            tuple: The status code, headers and body of the page.
+            None: If the URL was not recorded.
+        """
+        with self._lock:
+            entry = self.index.get(url)
+        if entry is None:
+            return None
+        with open(os.path.join(self.directory, entry['file']), 'rb') as body_file:
+            return entry['status_code'], entry['headers'], body_file.read()
+
+    def urls(self):
+        """
+        Returns every recorded URL.
+        """
+        with self._lock:
+            return list(self.index)
+
+class RecordingAdapter(HTTPAdapter):
+    def __init__(self, corpus: Corpus, **kwargs):
+        """
+        requests transport adapter saving every successful response to the corpus.
+        """
+        super().__init__(**kwargs)
+        self.corpus = corpus
+
+    def send(self, request, **kwargs):
+        response = super().send(request, **kwargs)
+        if response.status_code == 200:
+            self.corpus.save(request.url, response.status_code, response.headers, response.content)
+        return response
+
+class ReplayAdapter(BaseAdapter):
+    def __init__(self, corpus: Corpus):
+        """
+        requests transport adapter serving responses from the corpus, answering 404 for unknown URLs.
+        """
+        super().__init__()
+        self.corpus = corpus
+
+    def send(self, request, stream=False, timeout=None, verify=True, cert=None, proxies=None):
+        recorded = self.corpus.load(request.url)
+        if recorded is None:
+            logging.info(f"{request.url} is not in the corpus")
+            recorded = (404, {}, b'')
+        status_code, headers, body = recorded
+
+        response = requests.Response()
+        response.status_code = status_code
+        response.headers = CaseInsensitiveDict(headers)
+        response._content = body
+        response.url = request.url
+        response.request = request
+        response.encoding = requests.utils.get_encoding_from_headers(response.headers)
+        return response
+
+    def close(self):
+        pass
+
+class AsyncRecordingTransport(httpx.AsyncBaseTransport):
+    def __init__(self, corpus: Corpus, transport: httpx.AsyncBaseTransport = None):
+        """
+        httpx transport saving every successful response to the corpus.
+
+        Args:
+            corpus (Corpus): The corpus to record into.
+            transport (httpx.AsyncBaseTransport): The transport actually sending the requests.
+        """
+        self.corpus = corpus
+        self.transport = transport if transport is not None else httpx.AsyncHTTPTransport()
+
+    async def handle_async_request(self, request: httpx.Request):
+        response = await self.transport.handle_async_request(request)
+        if response.status_code == 200:
+            body = await response.aread()
+            self.corpus.save(str(request.url), response.status_code, response.headers, body)
+        return response
+
+    async def aclose(self):
+        await self.transport.aclose()
+
+class AsyncReplayTransport(httpx.AsyncBaseTransport):
+    def __init__(self, corpus: Corpus):
+        """
+        httpx transport serving responses from the corpus, answering 404 for unknown URLs.
+        """
+        self.corpus = corpus
+
+    async def handle_async_request(self, request: httpx.Request):
+        recorded = self.corpus.load(str(request.url))
+        if recorded is None:
+            logging.info(f"{request.url} is not in the corpus")
+            recorded = (404, {}, b'')
+        status_code, headers, body = recorded
+        return httpx.Response(status_code, headers=headers, content=body, request=request)
+
+def record(scraper, corpus: Corpus):
+    """
+    Makes the scraper save every page it fetches, in both sync and async mode, to the corpus.
+    """
+    adapter = RecordingAdapter(corpus)
+    scraper.session.mount('http://', adapter)
+    scraper.session.mount('https://', adapter)
+    scraper.transport = AsyncRecordingTransport(
+        corpus,
+        httpx.AsyncHTTPTransport(
+            limits=httpx.Limits(
+                max_connections=scraper.concurrency,
+                max_keepalive_connections=scraper.concurrency
+            )
+        )
+    )
+    return scraper
+
+def replay(scraper, corpus: Corpus):
+    """
+    Makes the scraper serve every page, in both sync and async mode, from the corpus.
+    """
+    adapter = ReplayAdapter(corpus)
+    scraper.session.mount('http://', adapter)
+    scraper.session.mount('https://', adapter)
+    scraper.transport = AsyncReplayTransport(corpus)
+    return scraper
@@ -0,0 +1,110 @@
+from collections import OrderedDict
+from fastapi import Request, Response
+from fastapi.encoders import jsonable_encoder
+import hashlib
+import json
+import threading
+
+# Clients may keep the responses, but must revalidate them with their ETag before reuse
+CACHE_CONTROL = "private, no-cache"
+
+class CachedResponse:
+    def __init__(self, generation: int, body: bytes):
+        """
+        Serialized response of a request, along with the ingest generation it was built from.
+
+        Args:
+            generation (int): The ingest generation of the data the response was built from.
+            body (bytes): The JSON body of the response.
+        """
+        self.generation = generation
+        self.body = body
+        self.etag = f'"{hashlib.blake2b(body, digest_size=16).hexdigest()}"'
+
+class ResponseCache:
+    def __init__(self, max_entries: int = 1024):
+        """
+        In-process LRU cache of serialized responses, keyed by the normalized parameters of a request.
+
+        An entry is only served while the ingest generation it was built from is current, so an ingested
+        batch invalidates every cached response at once without having to find them. Once `max_entries`
+        responses are cached, the least recently used one is evicted.
+
+        Args:
+            max_entries (int): The maximum number of cached responses.
+        """
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, generation: int):
+        """
+        Returns the cached response of a request.
+
+        Args:
+            key: The normalized parameters of the request.
+            generation (int): The current ingest generation.
+
+        Returns:
+            CachedResponse: The response built from the current generation.
+            None: If the request has no such response cached.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry.generation != generation:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def put(self, key, generation: int, content):
+        """
+        Serializes a response and caches it.
+
+        Args:
+            key: The normalized parameters of the request.
+            generation (int): The ingest generation the response was built from.
+            content: The response model, serialized without its unset fields.
+
+        Returns:
+            CachedResponse: The cached response.
+        """
+        body = json.dumps(jsonable_encoder(content, exclude_unset=True), separators=(',', ':')).encode()
+        entry = CachedResponse(generation, body)
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return entry
+
+    def metrics(self):
+        """
+        Returns the number of cached responses, hits and misses.
+        """
+        with self._lock:
+            return {'entries': len(self._entries), 'hits': self.hits, 'misses': self.misses}
+
+def cached_response(request: Request, entry: CachedResponse):
+    """
+    Answers a request with a cached response: 304 Not Modified if the client already holds it, as told
+    by its If-None-Match header, the JSON body otherwise.
+
+    Args:
+        request (Request): The request object, holding the If-None-Match header.
+        entry (CachedResponse): The cached response.
+
+    Returns:
+        Response: The response with its ETag and Cache-Control headers.
+    """
+    headers = {"ETag": entry.etag, "Cache-Control": CACHE_CONTROL}
+    if_none_match = request.headers.get("If-None-Match")
+    if if_none_match is not None:
+        # If-None-Match compares ETags weakly
+        etags = [etag.strip().removeprefix("W/") for etag in if_none_match.split(",")]
+        if entry.etag in etags or "*" in etags:
+            return Response(status_code=304, headers=headers)
+    return Response(content=entry.body, media_type="application/json", headers=headers)
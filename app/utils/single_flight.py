@@ -0,0 +1,83 @@
+import asyncio
+
+class _Call:
+    def __init__(self, future: asyncio.Future):
+        self.future = future
+        self.waiters = 0
+
+class SingleFlight:
+    def __init__(self):
+        """
+        Coalesces identical concurrent calls: while a call for a key is in flight, the callers asking for
+        the same key wait for its result instead of running it again. A burst of identical requests
+        then costs a single database query and serialization.
+
+        Calls are only shared while they are in flight, nothing is kept once they complete. The object
+        belongs to the event loop of the application and is not thread safe.
+        """
+        self._calls = {}
+        self.coalesced = 0
+
+    async def do(self, key, function):
+        """
+        Runs `function` for a key, or waits for the run already in flight for it.
+
+        If the caller running the function is cancelled (e.g. its client disconnected), one of the
+        waiting callers runs it again.
+
+        Args:
+            key: Hashable key identifying identical calls.
+            function: Coroutine function without arguments producing the result.
+
+        Returns:
+            The result of the function, shared by every caller of the key.
+
+        Raises:
+            Exception: Whatever the function raised, to every caller of the key.
+        """
+        while True:
+            call = self._calls.get(key)
+            if call is None:
+                break
+            call.waiters += 1
+            self.coalesced += 1
+            try:
+                return await asyncio.shield(call.future)
+            except asyncio.CancelledError:
+                if not call.future.cancelled():
+                    raise
+                # The running caller was cancelled, take over
+            finally:
+                call.waiters -= 1
+
+        call = _Call(asyncio.get_running_loop().create_future())
+        self._calls[key] = call
+        try:
+            result = await function()
+        except asyncio.CancelledError:
+            call.future.cancel()
+            raise
+        except Exception as e:
+            call.future.set_exception(e)
+            # Retrieved by the waiters, if any
+            call.future.exception()
+            raise
+        else:
+            call.future.set_result(result)
+            return result
+        finally:
+            del self._calls[key]
+
+    def metrics(self):
+        """
+        Returns the calls in flight and their number of waiting callers.
+
+        Returns:
+            dict: The number of calls in flight, the waiting callers of each in flight key, and the
+                total number of callers served by another caller's call.
+        """
+        return {
+            'in_flight': len(self._calls),
+            'waiters': {repr(key): call.waiters for key, call in self._calls.items()},
+            'coalesced': self.coalesced
+        }
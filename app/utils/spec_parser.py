@@ -0,0 +1,86 @@
+import re
+
+NUMBER_PATTERN = re.compile(r'\d[\d,]*(?:\.\d+)?')
+YEAR_PATTERN = re.compile(r'\b(19|20)\d{2}\b')
+
+"""
+Parsers turning the specification strings scraped from the website (e.g. 'RM 45,000', '95000 - 99999 km',
+'1496 cc') into numbers. Every parser returns None for a missing or unparsable value instead of raising,
+so a single odd listing never fails a batch.
+"""
+
+def _numbers(value):
+    """
+    Returns every number found in a specification value, in order.
+    """
+    if value is None:
+        return []
+    if isinstance(value, (int, float)):
+        return [float(value)]
+    return [float(number.replace(',', '')) for number in NUMBER_PATTERN.findall(str(value))]
+
+def parse_number(value):
+    """
+    Parses the first number of a specification value, e.g. '79.5 kW' -> 79.5.
+
+    Returns:
+        float: The number.
+        None: If the value holds no number.
+    """
+    numbers = _numbers(value)
+    return numbers[0] if numbers else None
+
+def parse_int(value):
+    """
+    Parses the first number of a specification value as an integer, e.g. '1,496 cc' -> 1496.
+
+    Returns:
+        int: The rounded number.
+        None: If the value holds no number.
+    """
+    number = parse_number(value)
+    return round(number) if number is not None else None
+
+def parse_price(value):
+    """
+    Parses a price, e.g. 'RM 45,000' -> 45000.
+    """
+    return parse_int(value)
+
+def parse_year(value):
+    """
+    Parses a manufacturing year, e.g. '2015' or '2015 (Reg. 2016)' -> 2015.
+
+    Returns:
+        int: The first plausible year of the value.
+        None: If the value holds no year.
+    """
+    if value is None:
+        return None
+    match = YEAR_PATTERN.search(str(value))
+    return int(match.group(0)) if match else None
+
+def parse_range(value):
+    """
+    Parses a range of integers such as a mileage, e.g. '95000 - 99999 km' -> (95000, 99999). A single
+    number gives a range of one value.
+
+    Returns:
+        tuple: The low and high bounds, both None if the value holds no number.
+    """
+    numbers = [round(number) for number in _numbers(value)]
+    if not numbers:
+        return None, None
+    return min(numbers[:2]), max(numbers[:2])
+
+def parse_range_low(value):
+    """
+    Parses the low bound of a range, e.g. '95000 - 99999 km' -> 95000.
+    """
+    return parse_range(value)[0]
+
+def parse_range_high(value):
+    """
+    Parses the high bound of a range, e.g. '95000 - 99999 km' -> 99999.
+    """
+    return parse_range(value)[1]
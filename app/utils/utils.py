@@ -72,7 +72,9 @@ def verify(plain_api_key, hashed_api_key):
 
 def generate_unique_id():
     """
-    Generates a unique ID based on timestamp and random characters.
+    Generates a unique ID based on a millisecond timestamp and random characters. The IDs sort by
+    creation time, and ten random characters make collisions between IDs generated within the same
+    millisecond negligible.
 
     Returns:
         str: The generated unique ID.
@@ -81,8 +83,8 @@ def generate_unique_id():
         Exception: If an error occurs during the ID generation process.
     """
     try:
-        timestamp = int(time.time())
-        random_string = ''.join(random.choices(string.ascii_letters + string.digits, k=6))
+        timestamp = int(time.time() * 1000)
+        random_string = ''.join(random.choices(string.ascii_letters + string.digits, k=10))
         unique_id = f'{timestamp}_{random_string}'
         return unique_id
     
@@ -1,52 +1,313 @@
 from bs4 import BeautifulSoup
-from ratelimit import limits, sleep_and_retry
+from typing import Callable, List
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+import asyncio
 import time
+import httpx
 import requests
 import logging
-import json
+from .next_data import AD_ID_PATTERN, parse_car_page, extract_next_data, extract_listing_summaries
+from .http_cache import HttpCache
+from .checkpoint import CrawlCheckpoint
+from .rate_limiter import AdaptiveRateLimiter, default_rate_limiter
+
+REQUEST_TIMEOUT = 30
+PARSERS = ("html5lib", "lxml", "html.parser")
+
+def extract_ad_id(url: str):
+    """
+    Extracts the Mudah ad id from a car details page URL.
+
+    Returns:
+        str: The ad id.
+        None: If the URL does not carry an ad id.
+    """
+    match = AD_ID_PATTERN.search(url or '')
+    return match.group(1) if match else None
+
+def build_shard_url(url: str, params: dict):
+    """
+    Adds the query parameters of a shard (e.g. a region, brand or price band filter) to the listing URL.
+
+    Returns:
+        str: The listing URL of the shard.
+    """
+    parts = urlsplit(url)
+    query = dict(parse_qsl(parts.query))
+    query.update({key: str(value) for key, value in params.items()})
+    return urlunsplit(parts._replace(query=urlencode(query)))
 
 class WebScraper:
-    def __init__(self, url):
+    def __init__(
+            self, 
+            url, 
+            concurrency: int = 10, 
+            rate_limiter: AdaptiveRateLimiter = None,
+            parser: str = "html5lib",
+            cache: HttpCache = None,
+            offline: bool = False,
+            checkpoint: CrawlCheckpoint = None,
+            stop_after_known: int = None,
+            is_known: Callable[[str], bool] = None,
+            use_listing_data: bool = False,
+            known_fingerprint: Callable[[str], str] = None,
+            shards: List[dict] = None,
+            transport: httpx.AsyncBaseTransport = None
+        ):
         """
         Constructor for the WebScraper class.
 
         Args:
             url (str): The URL from which content URLs will be scraped.
+            concurrency (int): The maximum number of in-flight detail page requests in async mode.
+            rate_limiter (AdaptiveRateLimiter): The rate limiter every request goes through. Defaults to 
+                the one shared by all scrapers of the process.
+            parser (str): The BeautifulSoup backend used for listing pages, one of "html5lib", "lxml" 
+                or "html.parser". Detail pages only fall back to it when the fast JSON extraction fails.
+            cache (HttpCache): Optional on-disk cache used to serve and revalidate previously fetched pages.
+            offline (bool): Serve pages from the cache only, never touching the network.
+            checkpoint (CrawlCheckpoint): Optional crawl frontier to resume from and keep up to date.
+            stop_after_known (int): Incremental mode, skip ads that are already stored and stop paginating 
+                once this many consecutive ones are seen. None walks every page.
+            is_known (Callable): Tells whether an ad id is already stored. Defaults to the ads recorded 
+                in the checkpoint.
+            use_listing_data (bool): Read the ad summaries embedded in the listing pages and only fetch the 
+                detail pages of ads that are new or whose price, brand, model, mileage or year changed.
+            known_fingerprint (Callable): Returns the summary fingerprint stored for an ad id. Defaults to 
+                the fingerprints recorded in the checkpoint.
+            shards (list): Query parameters splitting the listing into independent shards, e.g. 
+                [{'q': 'toyota'}, {'q': 'honda'}]. Each shard has its own pagination chain and, in async 
+                mode, the chains are walked concurrently. Ads found in several shards are only scraped once.
+            transport (httpx.AsyncBaseTransport): Optional transport of the async client, e.g. to replay 
+                recorded pages. The sync session can be redirected the same way by mounting an adapter.
         """
+        if stop_after_known is not None and checkpoint is None and is_known is None:
+            raise ValueError("Incremental mode requires a checkpoint or an is_known callable")
+        if use_listing_data and checkpoint is None and known_fingerprint is None:
+            raise ValueError("Listing data mode requires a checkpoint or a known_fingerprint callable")
+        if offline and cache is None:
+            raise ValueError("Offline mode requires a cache")
+        if parser not in PARSERS:
+            raise ValueError(f"Unknown parser: {parser}, expected one of {PARSERS}")
         self.url = url
         self.session = requests.Session()  
+        self.concurrency = concurrency
+        self.rate_limiter = rate_limiter if rate_limiter is not None else default_rate_limiter()
+        self.parser = parser
+        self.cache = cache
+        self.offline = offline
+        self.checkpoint = checkpoint
+        self.stop_after_known = stop_after_known
+        self.is_known = is_known
+        self.use_listing_data = use_listing_data
+        self.known_fingerprint = known_fingerprint
+        self.shards = shards
+        self.transport = transport
+
+    def _chain_urls(self):
+        """
+        Returns the URL each pagination chain of the crawl starts from.
+        """
+        if not self.shards:
+            return [self.url]
+        return [build_shard_url(self.url, params) for params in self.shards]
+
+    def _claim(self, link, claimed: set):
+        """
+        Claims a detail link for the current chain so other shards listing the same ad skip it.
+
+        Returns:
+            bool: True if the link was not claimed yet.
+        """
+        key = extract_ad_id(link) or link
+        if key in claimed:
+            return False
+        claimed.add(key)
+        return True
+
+    def _resume(self, start_url):
+        """
+        Returns the listing page to start from and the detail links still pending on it, as recorded
+        by the checkpoint (None for the pending links means every link of the page).
+        """
+        if self.checkpoint is None:
+            return start_url, None
+        return self.checkpoint.frontier(start_url)
+
+    def _ad_is_known(self, link):
+        """
+        Checks whether the ad behind a detail link is already stored.
+        """
+        ad_id = extract_ad_id(link)
+        if ad_id is None:
+            return False
+        if self.is_known is not None:
+            return self.is_known(ad_id)
+        return self.checkpoint is not None and self.checkpoint.is_seen(ad_id)
+
+    def _ad_is_unchanged(self, ad_id, summary):
+        """
+        Checks whether the listing summary of an ad matches the one recorded when it was last scraped.
+        """
+        if self.known_fingerprint is not None:
+            stored_fingerprint = self.known_fingerprint(ad_id)
+        else:
+            stored_fingerprint = self.checkpoint.fingerprint(ad_id)
+        return stored_fingerprint is not None and stored_fingerprint == summary['fingerprint']
+
+    def _skip_link(self, link, summaries):
+        """
+        Tells whether the details page behind a link does not need to be fetched.
+        """
+        ad_id = extract_ad_id(link)
+        if ad_id is None:
+            return False
+        if self.use_listing_data and ad_id in summaries:
+            # A known ad is fetched again as soon as its summary changed
+            return self._ad_is_unchanged(ad_id, summaries[ad_id])
+        return self.stop_after_known is not None and self._ad_is_known(link)
+
+    def _listing_summaries(self, html_text):
+        """
+        Extracts the ad summaries of a listing page when the listing data mode is on.
+
+        Returns:
+            dict: The summaries keyed by ad id, empty if the mode is off or the page has none.
+        """
+        if not self.use_listing_data:
+            return {}
+        return extract_listing_summaries(extract_next_data(html_text, parser=self.parser))
+
+    def _select_links(self, car_links, known_streak, summaries: dict = None):
+        """
+        Drops the links of already stored ads in incremental mode, and of unchanged ads in listing 
+        data mode.
+
+        Args:
+            car_links (list): The detail links of a listing page, in listing order.
+            known_streak (int): The number of consecutive known ads seen on the previous pages.
+            summaries (dict): The ad summaries of the listing page, keyed by ad id.
+
+        Returns:
+            tuple: The links to scrape, the updated streak, and whether the streak reached 
+                `stop_after_known` so pagination should stop.
+        """
+        if self.stop_after_known is None and not self.use_listing_data:
+            return car_links, known_streak, False
+
+        selected = []
+        for link in car_links:
+            if self._skip_link(link, summaries or {}):
+                known_streak += 1
+                if self.stop_after_known is not None and known_streak >= self.stop_after_known:
+                    print(f"Found {known_streak} consecutive known ads, stopping pagination")
+                    return selected, known_streak, True
+                continue
+            known_streak = 0
+            selected.append(link)
+        return selected, known_streak, False
+
+    def _link_done(self, start_url, link, scraped: bool, summaries: dict = None):
+        """
+        Records in the checkpoint that a detail link has been processed, along with the listing 
+        summary fingerprint of the ad.
+        """
+        if self.checkpoint is None:
+            return
+        if scraped:
+            ad_id = extract_ad_id(link)
+            summary = (summaries or {}).get(ad_id)
+            self.checkpoint.mark_seen(ad_id, summary['fingerprint'] if summary else None)
+        self.checkpoint.link_done(start_url, link)
+
+    def _cached_html(self, url):
+        """
+        Looks the URL up in the cache before any request is made.
+
+        Returns:
+            tuple: The cache entry (or None) and the body to return without requesting the page (or None).
+        """
+        if self.cache is None:
+            return None, None
+        entry = self.cache.get(url)
+        if entry is not None and (self.offline or self.cache.is_fresh(entry)):
+            return entry, entry.body
+        if self.offline:
+            logging.error(f"{url} is not cached, cannot retrieve it in offline mode")
+        return entry, None
+
+    def _store_html(self, url, entry, status_code, content, headers):
+        """
+        Stores a downloaded page in the cache, or serves the cached copy if the server answered 304.
+
+        Returns:
+            bytes: The HTML content of the webpage.
+        """
+        if status_code == 304 and entry is not None:
+            self.cache.revalidated(url)
+            return entry.body
+        if self.cache is not None:
+            self.cache.store(
+                url, 
+                content, 
+                etag=headers.get('ETag'), 
+                last_modified=headers.get('Last-Modified')
+            )
+        return content
 
-    @sleep_and_retry
-    @limits(calls=5, period=5)
     def _get_html(self, url):
         """
-        Sends a GET request to the class's URL and returns the response as text.
+        Returns the HTML content of a webpage, served from the cache when it is fresh and revalidated 
+        with a conditional request otherwise.
 
         Returns:
-            str: The HTML content of the webpage as text.
-            None: If the GET request fails or the response status code is not 200.
+            bytes: The HTML content of the webpage.
+            None: If the page could not be retrieved.
+        """
+        entry, html_text = self._cached_html(url)
+        if html_text is not None or self.offline:
+            return html_text
 
-        Raises:
-            requests.exceptions.RequestException: If an error occurs during the GET request or the response status code is not 200.
+        headers = self.cache.conditional_headers(entry) if self.cache is not None else {}
+        response = self._request(url, headers)
+        if response is None:
+            return None
+        return self._store_html(url, entry, response.status_code, response.content, response.headers)
+
+    def _request(self, url, headers: dict = None):
+        """
+        Sends a GET request to the given URL once the rate limiter allows it, reporting the outcome 
+        back to the limiter so it can adapt its rate.
+
+        Returns:
+            requests.Response: The response, with a status code of 200 or 304.
+            None: If the GET request fails or the response status code is not 200.
         """
         retries = 0
         MAX_RETRIES = 3
         delay = 1
         while retries < MAX_RETRIES:
             try:
-                response = self.session.get(url)
-                if response.status_code == 200:
-                    # Retrieve HTML content and return it
-                    html_text = response.content
-                    return html_text
+                self.rate_limiter.acquire()
+                started_at = time.monotonic()
+                response = self.session.get(url, headers=headers, timeout=REQUEST_TIMEOUT)
+                self.rate_limiter.record(
+                    status_code=response.status_code,
+                    latency=time.monotonic() - started_at,
+                    retry_after=response.headers.get('Retry-After')
+                )
+                if response.status_code in (200, 304):
+                    return response
                 elif response.status_code == 429:
                     logging.info(f'Rate Limit occured retrying for: {retries}/{MAX_RETRIES}')
-                    time.sleep(delay)  
+                    if not response.headers.get('Retry-After'):
+                        # Without a Retry-After, hold every request back for an increasing delay
+                        self.rate_limiter.record(retry_after=str(delay))
                     retries += 1
                     delay *= 2 
                 else:
                     # Raise an exception if the response status code is not 200
-                    raise requests.exceptions.RequestException(f"Invalid response status code {response.status_code} for {self.url}")
+                    raise requests.exceptions.RequestException(f"Invalid response status code {response.status_code} for {url}")
             
             except requests.exceptions.RequestException as e:
                 logging.error(f"Error retrieving HTML from {url}: {e}")
@@ -55,6 +316,81 @@ class WebScraper:
                 delay *= 2
             except Exception as e:
                 logging.error(f"Error retrieving HTML from {url}: {e}")
+                return None
+
+    async def _aget_html(self, client: httpx.AsyncClient, url):
+        """
+        Asynchronous counterpart of `_get_html`, sending the GET request over a pooled keep-alive client.
+
+        Args:
+            client (httpx.AsyncClient): The shared client holding the connection pool.
+            url (str): The URL of the webpage to retrieve.
+
+        Returns:
+            bytes: The HTML content of the webpage.
+            None: If the page could not be retrieved after all retries.
+        """
+        if self.cache is None:
+            response = await self._arequest(client, url)
+            return response.content if response is not None else None
+
+        # The cache reads and writes SQLite, keep them off the event loop so other fetches progress
+        entry, html_text = await asyncio.to_thread(self._cached_html, url)
+        if html_text is not None or self.offline:
+            return html_text
+
+        response = await self._arequest(client, url, self.cache.conditional_headers(entry))
+        if response is None:
+            return None
+        return await asyncio.to_thread(
+            self._store_html, url, entry, response.status_code, response.content, response.headers
+        )
+
+    async def _arequest(self, client: httpx.AsyncClient, url, headers: dict = None):
+        """
+        Asynchronous counterpart of `_request`.
+
+        Returns:
+            httpx.Response: The response, with a status code of 200 or 304.
+            None: If the page could not be retrieved after all retries.
+        """
+        retries = 0
+        MAX_RETRIES = 3
+        delay = 1
+        while retries < MAX_RETRIES:
+            try:
+                await self.rate_limiter.aacquire()
+                started_at = time.monotonic()
+                response = await client.get(url, headers=headers)
+                await self.rate_limiter.arecord(
+                    status_code=response.status_code,
+                    latency=time.monotonic() - started_at,
+                    retry_after=response.headers.get('Retry-After')
+                )
+                if response.status_code in (200, 304):
+                    return response
+                elif response.status_code == 429:
+                    logging.info(f'Rate Limit occured retrying for: {retries}/{MAX_RETRIES}')
+                    if not response.headers.get('Retry-After'):
+                        # Without a Retry-After, hold every request back for an increasing delay
+                        await self.rate_limiter.arecord(retry_after=str(delay))
+                    retries += 1
+                    delay *= 2
+                else:
+                    raise httpx.HTTPStatusError(
+                        f"Invalid response status code {response.status_code} for {url}",
+                        request=response.request,
+                        response=response
+                    )
+
+            except httpx.HTTPError as e:
+                logging.error(f"Error retrieving HTML from {url}: {e}")
+                await asyncio.sleep(delay)  # Backoff for other request exceptions
+                retries += 1
+                delay *= 2
+            except Exception as e:
+                logging.error(f"Error retrieving HTML from {url}: {e}")
+                return None
 
     def _parse_html(self, html_text: bytes):
         """
@@ -70,7 +406,7 @@ class WebScraper:
         try:
             if html_text:
                 # Parse HTML content and return soup object
-                soup = BeautifulSoup(html_text, 'html5lib')
+                soup = BeautifulSoup(html_text, self.parser)
                 return soup
             else:
                 # Return None if the HTML content cannot be retrieved or parsed
@@ -112,43 +448,19 @@ class WebScraper:
             logging.error(msg=error_message)
             raise e
      
-    def _get_car_details(self, soup: BeautifulSoup):
+    def _get_car_details(self, html_text: bytes):
         """
-        Extracts car details from a JSON embedded within the HTML soup. This method looks for a 'script' 
-        tag with a specific id and then parses the JSON content to retrieve car specifications.
+        Extracts car details from the JSON embedded in a car details page. The `__NEXT_DATA__` payload 
+        is read straight from the response bytes, so no DOM is built for detail pages.
 
         Args:
-            soup (bs4.BeautifulSoup): The soup object containing the parsed HTML content of a car details page.
+            html_text (bytes): The raw HTML content of a car details page.
         
         Returns:
             dict: A dictionary with car specifications, extracted from the JSON content.
+            None: If the page carries no car specifications.
         """
-        try:
-            car_specifications = {}
-            result = {}
-            # Extracting JSON data from a script tag
-            json_script_tag = soup.find('script', attrs={'id': '__NEXT_DATA__'})
-            json_data = json.loads(json_script_tag.string)
-
-            for item in json_data.get('props', {}).get('initialState', {}).get('adDetails', {}).get('byID').values():
-                # Parsing each car specification from the JSON data
-                car_specifications['PRICE'] = [{'label':'Price', 'value':item.get('attributes', {}).get('price')}]
-                for car_spec in (item.get('attributes', {}).get('mcdParams', [])):
-                    car_specifications[car_spec.get('header', '')] = car_spec.get('params', [])
-            
-            for category in car_specifications:
-                result[category] = {}
-                for item in car_specifications[category]:
-                    label = item['label']
-                    value = item['value']
-                    result[category][label] = value
-            
-            return result
-
-        except Exception as e:
-            error_message = f"Error occurred during car details extraction: {str(e)}"
-            logging.error(msg=error_message)
-            return None
+        return parse_car_page(html_text, parser=self.parser)
 
     def _next_page(self, soup: BeautifulSoup):
         """
@@ -175,40 +487,271 @@ class WebScraper:
             logging.error(msg=error_message)
             return None
 
-    def scrap_all_cars(self, limit: int = 50):
+    def _iter_chain(self, start_url, claimed: set):
+        """
+        Walks one pagination chain, yielding the outcome of every detail link it scrapes.
+
+        Args:
+            start_url (str): The listing URL the chain starts from.
+            claimed (set): The ads already claimed by this or another chain of the crawl.
+
+        Yields:
+            tuple: The detail link, its car details (None if they could not be scraped) and the 
+                ad summaries of its listing page.
+        """
+        current_url, pending_links = self._resume(start_url)
+        known_streak = 0
+        while current_url is not None:
+            print(f"Scrapping from {current_url}")
+            html_text = self._get_html(current_url)
+            print(f"Parsing data from {current_url}")
+            soup = self._parse_html(html_text)
+            summaries = self._listing_summaries(html_text)
+            car_links = self._get_car_link(soup) if pending_links is None else pending_links
+            pending_links = None
+            car_links, known_streak, caught_up = self._select_links(car_links, known_streak, summaries)
+            car_links = [link for link in car_links if self._claim(link, claimed)]
+            next_url = None if caught_up else self._next_page(soup)
+            print(f"Car links: ", car_links)
+            if self.checkpoint is not None:
+                self.checkpoint.set_frontier(start_url, current_url, car_links)
+
+            for link in car_links:
+                print(f"Scrapping from {link}")
+                html_text = self._get_html(link)
+                print(f"Parsing data from {link}")
+                yield link, self._get_car_details(html_text), summaries
+            current_url = next_url
+
+        if self.checkpoint is not None:
+            self.checkpoint.finish(start_url)
+
+    def iter_cars(self, limit: int = None):
+        """
+        Scrapes the cars from the website one by one, yielding each car as soon as its details page is parsed.
+        Shards are walked one after another.
+
+        Args:
+            limit (int): The maximum number of cars to yield, or None to walk every listing page.
+
+        Yields:
+            dict: The details of a car.
+        """
+        try:
+            yielded = 0
+            claimed = set()
+            for start_url in self._chain_urls():
+                for link, car_detail, summaries in self._iter_chain(start_url, claimed):
+                    if car_detail is not None:
+                        yield car_detail
+                        yielded += 1
+                    self._link_done(start_url, link, scraped=car_detail is not None, summaries=summaries)
+                    if limit is not None and yielded >= limit:
+                        return
+
+        except Exception as e:
+            error_message = f"Error occurred during scraping: {str(e)}"
+            logging.error(msg=error_message)
+            raise e
+
+    def scrap_all_cars(self, limit: int = 50, mode: str = "sync"):
         """
         Scrapes all cars from the website.
 
+        Args:
+            limit (int): The maximum number of cars to scrape.
+            mode (str): "sync" to fetch pages one after another, "async" to fetch detail pages concurrently.
+
         Returns:
             list: A list of dictionaries, where each dictionary contains the details of the cars.
         """
+        if mode == "async":
+            return asyncio.run(self.async_scrap_all_cars(limit=limit))
+        elif mode != "sync":
+            raise ValueError(f"Unknown scraping mode: {mode}")
+
+        return list(self.iter_cars(limit=limit))
+
+    async def _aget_car_detail(
+            self, 
+            client: httpx.AsyncClient, 
+            semaphore: asyncio.Semaphore, 
+            link
+        ):
+        """
+        Fetches and parses a single car detail page, holding one of the bounded in-flight slots.
+
+        Returns:
+            tuple: The link and the car details as produced by `_get_car_details`, which are None 
+                if the page could not be fetched or parsed.
+        """
+        async with semaphore:
+            print(f"Scrapping from {link}")
+            html_text = await self._aget_html(client, link)
+        if html_text is None:
+            return link, None
+        # Parsing is CPU bound, keep it off the event loop so other fetches can progress
+        return link, await asyncio.to_thread(self._get_car_details, html_text)
+
+    async def _awalk_chain(
+            self, 
+            client: httpx.AsyncClient, 
+            semaphore: asyncio.Semaphore, 
+            budget: asyncio.Semaphore, 
+            start_url, 
+            claimed: set, 
+            results: asyncio.Queue
+        ):
+        """
+        Walks one pagination chain, fetching the detail pages of each listing page concurrently and 
+        putting the scraped cars on the `results` queue.
+
+        Args:
+            client (httpx.AsyncClient): The shared client holding the connection pool.
+            semaphore (asyncio.Semaphore): Bounds the detail page requests in flight across all chains.
+            budget (asyncio.Semaphore): Bounds the cars scheduled across all chains to the crawl limit, 
+                None for no limit. Slots of detail pages that could not be scraped are given back.
+            start_url (str): The listing URL the chain starts from.
+            claimed (set): The ads already claimed by this or another chain of the crawl.
+            results (asyncio.Queue): Receives (start_url, link, car details, summaries, ack) for every 
+                scraped car, and (start_url, None, None, None, None) once the chain is exhausted. With a
+                checkpoint, `ack` is a future the consumer resolves once the car is recorded, and the chain
+                only moves the frontier to the next page once every car of the current one is acknowledged,
+                so a saved checkpoint never skips cars still waiting in the queue. `ack` is None otherwise.
+        """
+        current_url, pending_links = self._resume(start_url)
+        known_streak = 0
+        while current_url is not None:
+            print(f"Scrapping from {current_url}")
+            html_text = await self._aget_html(client, current_url)
+            print(f"Parsing data from {current_url}")
+            soup = await asyncio.to_thread(self._parse_html, html_text)
+            summaries = self._listing_summaries(html_text)
+            car_links = self._get_car_link(soup) if pending_links is None else pending_links
+            pending_links = None
+            car_links, known_streak, caught_up = self._select_links(car_links, known_streak, summaries)
+            car_links = [link for link in car_links if self._claim(link, claimed)]
+            next_url = None if caught_up else self._next_page(soup)
+            print(f"Car links: ", car_links)
+            if self.checkpoint is not None:
+                self.checkpoint.set_frontier(start_url, current_url, car_links)
+
+            pending = set()
+            acks = []
+            try:
+                while car_links or pending:
+                    # Only schedule as many detail pages as are still needed to reach the limit
+                    while car_links and (budget is None or not budget.locked() or not pending):
+                        if budget is not None:
+                            await budget.acquire()
+                        pending.add(asyncio.create_task(
+                            self._aget_car_detail(client, semaphore, car_links.pop(0))
+                        ))
+                    done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                    for task in done:
+                        link, car_detail = task.result()
+                        if car_detail is None:
+                            if budget is not None:
+                                budget.release()
+                            self._link_done(start_url, link, scraped=False)
+                            continue
+                        ack = asyncio.get_running_loop().create_future() if self.checkpoint is not None else None
+                        if ack is not None:
+                            acks.append(ack)
+                        await results.put((start_url, link, car_detail, summaries, ack))
+            finally:
+                for task in pending:
+                    task.cancel()
+            # The pending links of this page stay in the checkpoint until the consumer recorded every car
+            await asyncio.gather(*acks)
+            current_url = next_url
+
+        await results.put((start_url, None, None, None, None))
+
+    async def aiter_cars(self, limit: int = None):
+        """
+        Asynchronous counterpart of `iter_cars`, keeping up to `concurrency` detail page requests in flight.
+
+        Listing pages of a chain are still walked one after another since each page holds the link to 
+        the next, but the chains of every shard are walked concurrently and the detail pages of every 
+        listing page are fetched concurrently over a keep-alive connection pool. Each car is yielded as 
+        soon as its page is parsed. All requests share one rate limiter so the crawl stays within the 
+        politeness budget.
+
+        Args:
+            limit (int): The maximum number of cars to yield, or None to walk every listing page.
+
+        Yields:
+            dict: The details of a car.
+        """
         try:
-            current_url = self.url
-            car_details = []
-            while current_url is not None:
-                print(f"Scrapping from {current_url}")
-                html_text = self._get_html(current_url)
-                print(f"Parsing data from {current_url}")
-                soup = self._parse_html(html_text)
-                car_links = self._get_car_link(soup)
-                print(f"Car links: ", car_links)
-                for link in car_links:
-                    print(f"Scrapping from {link}")
-                    html_text = self._get_html(link)
-                    print(f"Parsing data from {link}")
-                    car_soup = self._parse_html(html_text)
-                    car_detail = self._get_car_details(car_soup)
-                    if car_detail is not None:
-                        car_details.append(car_detail)
-                    if len(car_details) >= limit:
-                        return car_details
-                current_url = self._next_page(soup)
+            semaphore = asyncio.Semaphore(self.concurrency)
+            budget = asyncio.Semaphore(limit) if limit is not None else None
+            results = asyncio.Queue(maxsize=self.concurrency)
+            claimed = set()
+            pool_limits = httpx.Limits(
+                max_connections=self.concurrency, 
+                max_keepalive_connections=self.concurrency
+            )
+            async with httpx.AsyncClient(
+                headers=dict(self.session.headers), 
+                limits=pool_limits, 
+                timeout=REQUEST_TIMEOUT, 
+                follow_redirects=True,
+                transport=self.transport
+            ) as client:
+                chain_urls = self._chain_urls()
+                chains = asyncio.gather(*[
+                    self._awalk_chain(client, semaphore, budget, start_url, claimed, results)
+                    for start_url in chain_urls
+                ])
+                try:
+                    yielded = 0
+                    finished_chains = 0
+                    while finished_chains < len(chain_urls):
+                        result_task = asyncio.ensure_future(results.get())
+                        await asyncio.wait({result_task, chains}, return_when=asyncio.FIRST_COMPLETED)
+                        if not result_task.done() and chains.done() and chains.exception() is not None:
+                            # A chain failed before the others finished, surface its error
+                            result_task.cancel()
+                            raise chains.exception()
+
+                        start_url, link, car_detail, summaries, ack = await result_task
+                        if link is None:
+                            # The chain is exhausted, the next crawl starts it from the beginning
+                            finished_chains += 1
+                            if self.checkpoint is not None:
+                                self.checkpoint.finish(start_url)
+                            continue
+
+                        yield car_detail
+                        yielded += 1
+                        self._link_done(start_url, link, scraped=True, summaries=summaries)
+                        if ack is not None:
+                            ack.set_result(None)
+                        if limit is not None and yielded >= limit:
+                            return
+                finally:
+                    chains.cancel()
+                    await asyncio.gather(chains, return_exceptions=True)
 
         except Exception as e:
             error_message = f"Error occurred during scraping: {str(e)}"
             logging.error(msg=error_message)
             raise e
 
+    async def async_scrap_all_cars(self, limit: int = 50):
+        """
+        Scrapes all cars from the website, fetching the detail pages concurrently.
+
+        Args:
+            limit (int): The maximum number of cars to scrape.
+
+        Returns:
+            list: A list of dictionaries, where each dictionary contains the details of the cars.
+        """
+        return [car_detail async for car_detail in self.aiter_cars(limit=limit)]
+
 if __name__ == "__main__":
     # x = WebScraper(url="https://www.mudah.my/malaysia/cars-for-sale").scrap_all_cars()
     x= WebScraper("https://www.mudah.my/2009+Toyota+VIOS+1+5+S+A+TRD+VERY+GOOD+CONDITION-104588287.htm").scrap_all_cars()
@@ -0,0 +1,163 @@
+"""
+Benchmarks of the web scraper against an offline corpus of recorded pages.
+
+Record a corpus once (this hits the website):
+
+    python -m benchmarks.bench_scraper record --corpus .cache/corpus --cars 200
+
+Then benchmark parsing and end-to-end crawls from the corpus, without any network access:
+
+    python -m benchmarks.bench_scraper run --corpus .cache/corpus --cars 100
+"""
+from contextlib import redirect_stdout
+from bs4 import BeautifulSoup
+import tracemalloc
+import argparse
+import json
+import time
+import io
+from app.utils.web_scraper import WebScraper, PARSERS, extract_ad_id
+from app.utils.rate_limiter import AdaptiveRateLimiter
+from app.utils.replay import Corpus, record, replay
+from app.utils.pipeline import CrawlPipeline
+
+DEFAULT_URL = "https://www.mudah.my/malaysia/cars-for-sale"
+
+class CountingCorpus(Corpus):
+    """
+    Corpus counting the pages served, to report pages per second.
+    """
+    loads = 0
+
+    def load(self, url: str):
+        self.loads += 1
+        return super().load(url)
+
+def unlimited_rate_limiter():
+    """
+    Returns a rate limiter that never waits, so replayed crawls measure the scraper alone.
+    """
+    return AdaptiveRateLimiter(rate=1e9, max_rate=1e9, burst=10**9)
+
+def record_corpus(url: str, directory: str, cars: int):
+    """
+    Crawls the website and records every fetched page into the corpus.
+    """
+    corpus = Corpus(directory)
+    scraper = record(WebScraper(url), corpus)
+    car_details = scraper.scrap_all_cars(limit=cars)
+    print(f"Recorded {len(corpus.urls())} pages ({len(car_details)} cars) into {directory}")
+
+def legacy_car_details(html_text: bytes):
+    """
+    The original detail page extraction: full html5lib DOM, then the __NEXT_DATA__ script tag.
+    """
+    soup = BeautifulSoup(html_text, 'html5lib')
+    return json.loads(soup.find('script', attrs={'id': '__NEXT_DATA__'}).string)
+
+def time_per_page(function, pages):
+    """
+    Runs `function` on every page and returns the average time per page in milliseconds.
+    """
+    if not pages:
+        return float('nan')
+    started_at = time.perf_counter()
+    for page in pages:
+        function(page)
+    return (time.perf_counter() - started_at) / len(pages) * 1000
+
+def bench_parsing(corpus: Corpus):
+    """
+    Reports the parse time per page of each scraper stage and parser backend.
+    """
+    listing_pages, detail_pages = [], []
+    for url in corpus.urls():
+        status_code, headers, body = corpus.load(url)
+        (detail_pages if extract_ad_id(url) else listing_pages).append(body)
+    print(f"\nParsing ({len(listing_pages)} listing pages, {len(detail_pages)} detail pages), ms/page")
+    print(f"{'parser':<12}{'_parse_html':>14}{'_get_car_link':>16}{'_next_page':>13}{'_get_car_details':>19}")
+
+    for parser in PARSERS:
+        try:
+            with redirect_stdout(io.StringIO()):
+                scraper = WebScraper(DEFAULT_URL, parser=parser)
+                soups = [scraper._parse_html(page) for page in listing_pages]
+                row = (
+                    time_per_page(scraper._parse_html, listing_pages),
+                    time_per_page(scraper._get_car_link, soups),
+                    time_per_page(scraper._next_page, soups),
+                    time_per_page(scraper._get_car_details, detail_pages),
+                )
+        except Exception as e:
+            print(f"{parser:<12}unavailable: {e}")
+            continue
+        print(f"{parser:<12}{row[0]:>14.2f}{row[1]:>16.2f}{row[2]:>13.2f}{row[3]:>19.2f}")
+
+    print(f"{'legacy':<12}{'':>14}{'':>16}{'':>13}{time_per_page(legacy_car_details, detail_pages):>19.2f}")
+
+def bench_crawl(corpus: CountingCorpus, url: str, cars: int, parser: str, mode: str, concurrency: int):
+    """
+    Replays a crawl of `cars` cars and returns its wall time, pages per second and peak memory.
+    """
+    scraper = replay(
+        WebScraper(url, parser=parser, concurrency=concurrency, rate_limiter=unlimited_rate_limiter()),
+        corpus
+    )
+    corpus.loads = 0
+    tracemalloc.start()
+    started_at = time.perf_counter()
+    with redirect_stdout(io.StringIO()):
+        if mode == "pipeline":
+            scraped = CrawlPipeline(scraper, persist=lambda batch: None, fetch_workers=concurrency).run(limit=cars)
+        else:
+            scraped = len(scraper.scrap_all_cars(limit=cars, mode=mode))
+    elapsed = time.perf_counter() - started_at
+    peak_memory = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return {
+        'cars': scraped,
+        'seconds': elapsed,
+        'pages_per_second': corpus.loads / elapsed if elapsed else float('nan'),
+        'peak_memory_mb': peak_memory / 1024 / 1024
+    }
+
+def run_benchmarks(directory: str, url: str, cars: int, concurrencies: list):
+    """
+    Runs the parsing benchmarks and the end-to-end crawl benchmarks across parsers, modes and concurrency.
+    """
+    corpus = CountingCorpus(directory)
+    if not corpus.urls():
+        raise SystemExit(f"The corpus in {directory} is empty, record one first")
+    bench_parsing(corpus)
+
+    print(f"\nEnd-to-end crawl of {cars} cars")
+    print(f"{'parser':<12}{'mode':<10}{'concurrency':>12}{'cars':>6}{'seconds':>10}{'pages/s':>10}{'peak MB':>10}")
+    for parser in PARSERS:
+        for mode in ("sync", "async", "pipeline"):
+            for concurrency in (concurrencies if mode != "sync" else [1]):
+                try:
+                    result = bench_crawl(corpus, url, cars, parser, mode, concurrency)
+                except Exception as e:
+                    print(f"{parser:<12}{mode:<10}{concurrency:>12}  failed: {e}")
+                    continue
+                print(
+                    f"{parser:<12}{mode:<10}{concurrency:>12}{result['cars']:>6}{result['seconds']:>10.2f}"
+                    f"{result['pages_per_second']:>10.1f}{result['peak_memory_mb']:>10.1f}"
+                )
+
+def main():
+    argument_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    argument_parser.add_argument('command', choices=['record', 'run'])
+    argument_parser.add_argument('--corpus', default='.cache/corpus', help='directory of the recorded pages')
+    argument_parser.add_argument('--url', default=DEFAULT_URL, help='listing URL the crawl starts from')
+    argument_parser.add_argument('--cars', type=int, default=50, help='number of cars to crawl')
+    argument_parser.add_argument('--concurrency', type=int, nargs='+', default=[1, 4, 16], help='concurrency settings to compare')
+    arguments = argument_parser.parse_args()
+
+    if arguments.command == 'record':
+        record_corpus(arguments.url, arguments.corpus, arguments.cars)
+    else:
+        run_benchmarks(arguments.corpus, arguments.url, arguments.cars, arguments.concurrency)
+
+if __name__ == "__main__":
+    main()
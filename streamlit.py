@@ -16,22 +16,15 @@ def create_price_plots(car_details):
     model = []
     manufacturing_year = []
     for car_detail in car_details:
-        # Extract the price as a string and remove the currency symbol and commas
-        price_str = car_detail['general']['price'].replace('RM ', '').replace(',', '')
-
-        try:
-            price_value = float(price_str)
-            price.append(price_value)
-            brand.append(car_detail['general']['brand'])
-            model.append(car_detail['general']['model'])
-            # manufacturing_year.append(car_detail['general']['mfg_year'])
-            for item in car_detail['general']['mfg_year'].split(' '):
-                try:
-                    manufacturing_year.append(int(item))
-                except Exception as _:
-                    continue
-        except ValueError:
+        # The API returns the price and year already parsed, cars without them are left out
+        price_value = car_detail['general'].get('price_value')
+        mfg_year = car_detail['general'].get('mfg_year_value')
+        if price_value is None or mfg_year is None:
             continue
+        price.append(price_value)
+        brand.append(car_detail['general']['brand'])
+        model.append(car_detail['general']['model'])
+        manufacturing_year.append(mfg_year)
 
     # Histogram (Distribution of Car Prices)
     fig, ax = plt.subplots(figsize=(10, 5))
@@ -98,20 +91,16 @@ def create_age_mileage_plots(car_details):
     car_age = []
     car_mileage = []
     for car_detail in car_details:
-        try:
-            mfg_year = int(car_detail['general']['mfg_year'])
-            car_mil = car_detail['general']['mileage'].replace(' ', '')
-            mil_range = []
-            for item in car_mil.split('-'):
-                mil_range.append(int(item))
-            car_mileage.append(mil_range)
-            car_age.append(datetime.date.today().year - mfg_year)
-
-        except ValueError:
+        mfg_year = car_detail['general'].get('mfg_year_value')
+        mileage_low = car_detail['general'].get('mileage_low')
+        mileage_high = car_detail['general'].get('mileage_high')
+        if mfg_year is None or mileage_low is None or mileage_high is None:
             continue
+        car_mileage.append([mileage_low, mileage_high])
+        car_age.append(datetime.date.today().year - mfg_year)
     
     # Process the mileage to get a single representative value (average of the range)
-    mileage_values = [np.mean(list(map(int, m))) for m in car_mileage]
+    mileage_values = [np.mean(m) for m in car_mileage]
 
     # Group mileage values by car age
     mileage_by_age = defaultdict(list)
@@ -141,9 +130,21 @@ def create_age_mileage_plots(car_details):
     st.pyplot(fig)
 
 
+def get_car_details(session, page_size=200):
+    # The API returns the cars page by page, follow the cursors until the last page.
+    # The plots only use the general section, so the other sections are not requested.
+    car_details = []
+    params = {'limit': page_size, 'sections': 'general'}
+    while True:
+        response = session.get('http://127.0.0.1:8000/car/', params=params)
+        page = json.loads(response.content)
+        car_details.extend(page['items'])
+        if not page['next_cursor']:
+            return car_details
+        params['cursor'] = page['next_cursor']
+
 session = requests.Session()
 session.headers.update({'X-API-KEY': os.getenv("API_KEY")})
-response = session.get('http://127.0.0.1:8000/car/')
-car_details = json.loads(response.content)
+car_details = get_car_details(session)
 create_price_plots(car_details)
 create_age_mileage_plots(car_details)
\ No newline at end of file
@@ -0,0 +1,10 @@
+import os
+import tempfile
+
+"""
+The settings are read when the application is imported, so the tests point it at a throwaway SQLite 
+database first.
+"""
+os.environ["DATABASE_BACKEND"] = "sqlite"
+os.environ["SQLITE_PATH"] = os.path.join(tempfile.mkdtemp(prefix="tekkis-tests-"), "tekkis.sqlite3")
+os.environ["STARTUP_SCRAPE_LIMIT"] = "0"
@@ -0,0 +1,36 @@
+import pytest
+from sqlalchemy import text
+from app.database.db_bootstrap import bootstrap
+from app.database.db_setup import get_engine
+from app.controller.car.car_query import CarQuery
+
+@pytest.fixture(scope="module")
+def connection():
+    bootstrap()
+    with get_engine().connect() as connection:
+        yield connection
+
+def car_query(**params):
+    defaults = dict(
+        brand=None, model=None, min_year=None, max_year=None, min_price=None, max_price=None,
+        min_mileage=None, max_mileage=None, transmission=None, fuel_type=None, sort='id'
+    )
+    return CarQuery(**{**defaults, **params})
+
+def query_plan(connection, statement):
+    compiled = statement.compile(dialect=connection.dialect, compile_kwargs={"literal_binds": True})
+    return [row[-1] for row in connection.execute(text(f"EXPLAIN QUERY PLAN {compiled}"))]
+
+@pytest.mark.parametrize("after", [None, {"id": 5, "value": 30000}])
+def test_brand_year_price_filter_sorted_by_price_uses_index(connection, after):
+    query = car_query(brand="Toyota", min_year=2015, max_year=2020, max_price=60000, sort="price")
+    plan = query_plan(connection, query.statement(after).limit(51))
+
+    assert any("ix_general_brand_price" in step for step in plan), plan
+    assert not any("USE TEMP B-TREE" in step for step in plan), plan
+
+def test_price_sort_walks_price_index(connection):
+    plan = query_plan(connection, car_query(sort="-price").statement().limit(51))
+
+    assert any("ix_general_price" in step for step in plan), plan
+    assert not any("USE TEMP B-TREE" in step for step in plan), plan
@@ -0,0 +1,47 @@
+from sqlalchemy import create_engine, text
+from app.database.db_ingest import natural_listing_key
+from app.database.db_migrations import add_listing_key
+
+LEGACY_GENERAL = """
+CREATE TABLE general (
+    id INTEGER PRIMARY KEY, car_id VARCHAR(255), brand VARCHAR(255), model VARCHAR(255),
+    variant VARCHAR(255), series VARCHAR(255), mfg_year VARCHAR(255), mileage VARCHAR(255),
+    type VARCHAR(255), seat_capacity VARCHAR(255), country_of_origin VARCHAR(255), price VARCHAR(255)
+)
+"""
+
+def seed_legacy_cars(connection, cars):
+    connection.execute(text(LEGACY_GENERAL))
+    for car_id, brand, model in cars:
+        connection.execute(
+            text("INSERT INTO general (car_id, brand, model, variant, series, mfg_year, price) "
+                 "VALUES (:car_id, :brand, :model, '1.5', 'NCP', '2015', 'RM 45,000')"),
+            {"car_id": car_id, "brand": brand, "model": model}
+        )
+
+def listing_keys(connection):
+    return dict(connection.execute(text("SELECT car_id, listing_key FROM general")).all())
+
+def test_listing_key_migration_keys_duplicate_legacy_rows(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'legacy.sqlite3'}")
+    with engine.begin() as connection:
+        seed_legacy_cars(connection, [
+            ("vios-1", "Toyota", "Vios"),
+            ("vios-2", "Toyota", "Vios"),
+            ("city-1", "Honda", "City"),
+            ("vios-3", "Toyota", "Vios"),
+        ])
+        add_listing_key(connection)
+        keys = listing_keys(connection)
+
+    vios_key = natural_listing_key({"brand": "Toyota", "model": "Vios", "variant": "1.5", "series": "NCP", "mfg_year": "2015"})
+    assert keys["vios-1"] == vios_key
+    assert keys["city-1"].startswith("nk:")
+    assert keys["vios-2"].startswith("legacy:") and keys["vios-3"].startswith("legacy:")
+    assert len(set(keys.values())) == len(keys)
+
+    # Running the migration again leaves the keys as they are
+    with engine.begin() as connection:
+        add_listing_key(connection)
+        assert listing_keys(connection) == keys
+    engine.dispose()